@@ -41,13 +41,15 @@ wrapper file) will be queued or running at the same time
 import datetime
 import os
 
-from nexusformat.nexus import NeXusError, NXLock, nxload
+from nexusformat.nexus import NeXusError, nxload
 from sqlalchemy import (Column, ForeignKey, Integer, String, create_engine,
                         inspect)
 from sqlalchemy.dialects import mysql
 from sqlalchemy.ext.declarative import declarative_base
 from sqlalchemy.orm import relationship, sessionmaker
 
+from .nxlock import NXFileLock
+
 Base = declarative_base()
 # Records files that have: not been processed, queued on the NXserver
 # but not started, started processing, finished processing
@@ -137,12 +139,14 @@ class NXDatabase(object):
         echo : bool, optional
             True if SQL statements are echoed to `stdout`, by default False.
         """
-        with NXLock(db_file):
+        with NXFileLock(db_file):
             connection = 'sqlite:///' + db_file
             self.engine = create_engine(connection, echo=echo)
             Base.metadata.create_all(self.engine)
         self.database = os.path.realpath(self.engine.url.database)
         self._session = None
+        self._checked = False
+        self._deferred = False
 
     @property
     def session(self):
@@ -150,6 +154,11 @@ class NXDatabase(object):
             self._session = sessionmaker(bind=self.engine)()
         return self._session
 
+    def commit(self):
+        """Commit changes, unless commits are deferred by 'update_files'."""
+        if not self._deferred:
+            self.session.commit()
+
     def get_filename(self, filename):
         """Return the relative path of the requested filename."""
         root = os.path.dirname(os.path.dirname(self.database))
@@ -176,7 +185,7 @@ class NXDatabase(object):
             if not os.path.exists(filename):
                 raise NeXusError(f"'{filename}' does not exist")
             self.session.add(File(filename=self.get_filename(filename)))
-            self.session.commit()
+            self.commit()
             f = self.sync_file(filename)
         else:
             if (f.entries is None or f.entries == ''
@@ -186,6 +195,40 @@ class NXDatabase(object):
             f = self.sync_data(filename)
         return f
 
+    def get_files(self, filenames):
+        """Return the File objects matching a list of filenames.
+
+        Files already in the database are retrieved with a single query,
+        and their data status is updated in a single transaction.
+
+        Parameters
+        ----------
+        filenames : list of str
+            Paths of wrapper files.
+
+        Returns
+        -------
+        dict
+            File objects, keyed by the requested filenames.
+        """
+        self.check_tasks()
+        names = {self.get_filename(filename): filename
+                 for filename in filenames}
+        files = {}
+        for f in self.session.query(File).filter(File.filename.in_(names)):
+            filename = names[f.filename]
+            if (f.entries is None or f.entries == ''
+                    or isinstance(f.entries, int)):
+                root = nxload(filename)
+                f.set_entries([e for e in root.entries if e != 'entry'])
+            self.update_data(f, filename)
+            files[filename] = f
+        self.commit()
+        for filename in filenames:
+            if filename not in files:
+                files[filename] = self.get_file(filename)
+        return files
+
     def query(self, filename):
         return self.session.query(File) \
             .filter(File.filename == self.get_filename(filename)) \
@@ -251,7 +294,7 @@ class NXDatabase(object):
                 else:
                     setattr(f, task, IN_PROGRESS)
             f.set_entries(entries)
-            self.session.commit()
+            self.commit()
         return f
 
     def sync_data(self, filename):
@@ -269,21 +312,25 @@ class NXDatabase(object):
         """
         f = self.query(filename)
         if f:
-            scan_dir = get_directory(filename)
-            entries = f.get_entries()
-            data = 0
-            for e in entries:
-                if os.path.exists(os.path.join(scan_dir, e+'.h5')):
-                    data += 1
-            if data == 0:
-                f.data = NOT_STARTED
-            elif data == len(entries):
-                f.data = DONE
-            else:
-                f.data = IN_PROGRESS
-            self.session.commit()
+            self.update_data(f, filename)
+            self.commit()
         return f
 
+    def update_data(self, f, filename):
+        """Set the raw data status of a File without committing it."""
+        scan_dir = get_directory(filename)
+        entries = f.get_entries()
+        data = 0
+        for e in entries:
+            if os.path.exists(os.path.join(scan_dir, e+'.h5')):
+                data += 1
+        if data == 0:
+            f.data = NOT_STARTED
+        elif data == len(entries):
+            f.data = DONE
+        else:
+            f.data = IN_PROGRESS
+
     def get_task(self, f, task, entry):
         """Return the latest database entry for the specified task.
 
@@ -319,7 +366,7 @@ class NXDatabase(object):
         entry : str
             Entry of NeXus file being checked.
         """
-        with NXLock(self.database):
+        with NXFileLock(self.database):
             f = self.get_file(filename)
             if entry:
                 for t in reversed(f.tasks):
@@ -347,7 +394,7 @@ class NXDatabase(object):
         entry : str
             Entry of NeXus file being updated.
         """
-        with NXLock(self.database):
+        with NXFileLock(self.database):
             f = self.get_file(filename)
             t = self.get_task(f, task, entry)
             t.status = QUEUED
@@ -370,7 +417,7 @@ class NXDatabase(object):
         entry : str
             Entry of NeXus file being updated.
         """
-        with NXLock(self.database):
+        with NXFileLock(self.database):
             f = self.get_file(filename)
             t = self.get_task(f, task, entry)
             t.status = IN_PROGRESS
@@ -397,7 +444,7 @@ class NXDatabase(object):
         entry : str
             Entry of NeXus file being updated.
         """
-        with NXLock(self.database):
+        with NXFileLock(self.database):
             f = self.get_file(filename)
             t = self.get_task(f, task, entry)
             t.status = DONE
@@ -419,7 +466,7 @@ class NXDatabase(object):
         entry : str
             Entry of NeXus file being updated.
         """
-        with NXLock(self.database):
+        with NXFileLock(self.database):
             f = self.get_file(filename)
             for t in reversed(f.tasks):
                 if t.name == task and t.entry == entry:
@@ -488,9 +535,29 @@ class NXDatabase(object):
         filename : str
             Path of wrapper file relative to GUP directory.
         """
-        with NXLock(self.database):
+        with NXFileLock(self.database):
             self.sync_file(filename)
 
+    def update_files(self, filenames):
+        """Update the File objects for a list of files.
+
+        The database is locked once, and all the changes are committed in
+        a single transaction.
+
+        Parameters
+        ----------
+        filenames : list of str
+            Paths of wrapper files.
+        """
+        with NXFileLock(self.database):
+            self._deferred = True
+            try:
+                for filename in filenames:
+                    self.sync_file(filename)
+            finally:
+                self._deferred = False
+                self.session.commit()
+
     def sync_db(self, sample_dir):
         """ Populate the database based on local files.
 
@@ -505,9 +572,13 @@ class NXDatabase(object):
             for filename in os.listdir(sample_dir)
             if filename.endswith('.nxs') and
             all(x not in filename for x in ('parent', 'mask'))]
-        with NXLock(self.database):
-            for wrapper_file in wrapper_files:
-                self.sync_file(self.get_file(wrapper_file))
+        with NXFileLock(self.database):
+            self._deferred = True
+            try:
+                for wrapper_file in wrapper_files:
+                    self.sync_file(wrapper_file)
+            finally:
+                self._deferred = False
             tracked_files = list(self.session.query(File).all())
             for f in tracked_files:
                 if f.filename not in [
@@ -517,6 +588,8 @@ class NXDatabase(object):
 
     def check_tasks(self):
         """Check that all tasks are present, adding a column if necessary."""
+        if self._checked:
+            return
         inspector = inspect(self.engine)
         tasks = [task['name'] for task in inspector.get_columns('files')]
         for task in self.task_names:
@@ -524,6 +597,7 @@ class NXDatabase(object):
                 self.add_column(task)
         if 'entries' not in tasks:
             self.add_column('entries', data_type=String)
+        self._checked = True
 
     def add_column(self, column_name, table_name='files',
                    data_type=Integer, default=None):
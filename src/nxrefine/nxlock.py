@@ -0,0 +1,139 @@
+# -----------------------------------------------------------------------------
+# Copyright (c) 2022, AXMAS Development Team.
+#
+# Distributed under the terms of the Modified BSD License.
+#
+# The full license is in the file COPYING, distributed with this software.
+# -----------------------------------------------------------------------------
+
+"""Advisory file locks based on the operating system's flock call."""
+
+import os
+import random
+import time
+import timeit
+
+from nexusformat.nexus import NeXusError, NXLock, NXLockException, nxgetconfig
+
+try:
+    import fcntl
+except ImportError:
+    fcntl = None
+
+
+class _FlockLock(object):
+    """Exclusive lock on a file using `fcntl.flock`.
+
+    The lock is held on a companion file, with a '.flock' suffix, that is
+    never removed, so the lock is released by the operating system if
+    the process holding it dies. Processes waiting for the lock retry
+    with an exponential backoff, starting at 25 ms and increasing up to
+    the check interval. The lock file is made writable by all users, since
+    task directories are shared, and contains the process id of the
+    current lock holder, if it could be opened for writing.
+
+    Since the lock file differs from the '.lock' file used by `NXLock`,
+    processes using this class do not exclude processes still running an
+    earlier version that uses `NXLock`.
+
+    Parameters
+    ----------
+    filename : str
+        File path to the file being locked
+    timeout : int, optional
+        Number of seconds to wait for the lock, by default the value of
+        the nexusformat 'lock' setting, as used by `NXLock`. If this is 0,
+        no lock is acquired.
+    check_interval : float, optional
+        Maximum number of seconds between attempts to acquire the lock,
+        by default 0.5
+    """
+
+    def __init__(self, filename, timeout=None, check_interval=0.5):
+        self.filename = os.path.realpath(filename)
+        self.lock_file = self.filename + '.flock'
+        if timeout is None:
+            timeout = nxgetconfig('lock')
+        self.timeout = timeout
+        self.check_interval = check_interval
+        self.fd = None
+
+    def __repr__(self):
+        return f"NXFileLock('{os.path.basename(self.filename)}')"
+
+    def acquire(self, timeout=None):
+        """Acquire the lock, waiting for up to `timeout` seconds."""
+        if self.fd is not None:
+            return
+        if timeout is None:
+            timeout = self.timeout
+        if timeout == 0:
+            return
+        timeoutend = timeit.default_timer() + timeout
+        delay = 0.025
+        fd, writable = self.open()
+        while True:
+            try:
+                fcntl.flock(fd, fcntl.LOCK_EX | fcntl.LOCK_NB)
+                break
+            except BlockingIOError:
+                if timeit.default_timer() > timeoutend:
+                    os.close(fd)
+                    raise NXLockException(
+                        f"'{self.filename}' is currently locked by another "
+                        "process")
+                time.sleep(delay + random.uniform(0, 0.025))
+                delay = min(2 * delay, self.check_interval)
+        if writable:
+            os.ftruncate(fd, 0)
+            os.write(fd, f"{os.getpid()}\n".encode())
+        self.fd = fd
+
+    def open(self):
+        """Open the lock file, creating it if necessary.
+
+        A lock file created by another user may not be writable, but
+        `flock` only needs a file descriptor, so it is then opened
+        read-only.
+
+        Returns
+        -------
+        tuple of (int, bool)
+            File descriptor and whether it was opened for writing.
+        """
+        try:
+            fd = os.open(self.lock_file, os.O_CREAT | os.O_RDWR, 0o666)
+        except PermissionError:
+            try:
+                return os.open(self.lock_file, os.O_RDONLY), False
+            except OSError as error:
+                raise NeXusError(
+                    f"Cannot open lock file '{self.lock_file}': {error}")
+        except OSError as error:
+            raise NeXusError(
+                f"Cannot open lock file '{self.lock_file}': {error}")
+        try:
+            os.chmod(self.lock_file, 0o666)
+        except OSError:
+            pass
+        return fd, True
+
+    def release(self):
+        """Release the lock."""
+        if self.fd is not None:
+            fcntl.flock(self.fd, fcntl.LOCK_UN)
+            os.close(self.fd)
+            self.fd = None
+
+    def __enter__(self):
+        self.acquire()
+        return self
+
+    def __exit__(self, *args):
+        self.release()
+
+    def __del__(self):
+        self.release()
+
+
+NXFileLock = _FlockLock if fcntl else NXLock
@@ -6,15 +6,20 @@
 # The full license is in the file COPYING, distributed with this software.
 # -----------------------------------------------------------------------------
 
+import atexit
+import functools
 import logging
 import logging.handlers
+import multiprocessing
 import operator
 import os
 import platform
+import queue
 import shutil
 import subprocess
 import timeit
-from concurrent.futures import ProcessPoolExecutor, as_completed
+from concurrent.futures import (ProcessPoolExecutor, ThreadPoolExecutor,
+                                as_completed)
 from datetime import datetime
 
 import h5py as h5
@@ -35,7 +40,116 @@ from .nxrefine import NXRefine
 from .nxserver import NXServer
 from .nxsettings import NXSettings
 from .nxsymmetry import NXSymmetry
-from .nxutils import mask_volume, peak_search
+from .nxutils import (NXBlob, blob_fields, chunk_cached, mask_volume,
+                      memory_mapped, peak_search, valid_blobs)
+
+log_queues = {}
+
+
+def queue_handler(log_file, formatter):
+    """Return a handler that passes log records to a background thread.
+
+    Log files are written by a single QueueListener for each file, so
+    that logging calls made during data reduction do not block on file
+    I/O. The listener is stopped, and any remaining records written, when
+    the interpreter exits. Since the listener thread is not inherited by
+    forked processes, and exit handlers are not run by multiprocessing
+    workers, records logged in worker processes are written directly to
+    the log file.
+
+    Parameters
+    ----------
+    log_file : str
+        File path to the log file
+    formatter : logging.Formatter
+        Formatter used to write the log records
+
+    Returns
+    -------
+    logging.Handler
+        Handler that adds log records to the queue, or writes them to the
+        log file in worker processes
+    """
+    if multiprocessing.parent_process() is not None:
+        fileHandler = logging.FileHandler(log_file)
+        fileHandler.setFormatter(formatter)
+        return fileHandler
+    key = (os.getpid(), log_file)
+    if key not in log_queues:
+        log_queue = queue.SimpleQueue()
+        fileHandler = logging.FileHandler(log_file)
+        fileHandler.setFormatter(formatter)
+        listener = logging.handlers.QueueListener(log_queue, fileHandler)
+        listener.start()
+        atexit.register(listener.stop)
+        log_queues[key] = log_queue
+    return logging.handlers.QueueHandler(log_queues[key])
+
+
+def log_handlers(task_directory, socket=False, gui=False):
+    """Return the handlers shared by all NXReduce loggers in a process.
+
+    Parameters
+    ----------
+    task_directory : str
+        Path to the directory containing the log file
+    socket : bool, optional
+        True if log records are sent to the logging server, by default
+        False
+    gui : bool, optional
+        True if called from the GUI, in which case records are not
+        written to the console, by default False
+
+    Returns
+    -------
+    tuple of logging.Handler
+        Handlers to be added to the logger
+    """
+    return _log_handlers(os.getpid(), task_directory, socket, gui)
+
+
+@functools.lru_cache(maxsize=None)
+def _log_handlers(pid, task_directory, socket, gui):
+    """Return the logging handlers cached for the process ID."""
+    if socket:
+        handlers = [logging.handlers.SocketHandler(
+            'localhost', logging.handlers.DEFAULT_TCP_LOGGING_PORT)]
+    else:
+        formatter = logging.Formatter(
+            "%(asctime)s %(name)-12s: %(message)s",
+            datefmt='%Y-%m-%d %H:%M:%S')
+        handlers = [queue_handler(
+            os.path.join(task_directory, 'nxlogger.log'), formatter)]
+    if not gui:
+        handlers.append(logging.StreamHandler())
+    return tuple(handlers)
+
+
+def reduce_entry(entry, directory, **kwargs):
+    """Perform the data reduction workflow on a single entry.
+
+    This is defined at module level so that separate entries can be
+    reduced in parallel processes. The combine and PDF steps, which
+    require all the entries, are not performed.
+
+    Parameters
+    ----------
+    entry : str
+        Name of the entry containing the rotation scan
+    directory : str
+        Path to the directory containing the raw data
+    **kwargs
+        Keyword arguments used to initialize NXReduce
+
+    Returns
+    -------
+    str
+        Name of the reduced entry
+    """
+    reduce = NXReduce(entry=entry, directory=directory, **kwargs)
+    reduce.combine = reduce.pdf = False
+    reduce.nxreduce()
+    return entry
 
 
 class NXReduce(QtCore.QObject):
@@ -174,7 +288,11 @@ class NXReduce(QtCore.QObject):
         self.name = f"{self.sample}_{self.scan}/{self.entry_name}"
         self.base_directory = os.path.dirname(self.wrapper_file)
 
+        self._entry = None
+        self._processes = None
         self._data = data
+        self._data_group = None
+        self._data_file = None
         self._field_root = None
         self._field = None
         self._shape = None
@@ -206,6 +324,8 @@ class NXReduce(QtCore.QObject):
 
         self._maximum = None
         self.summed_data = None
+        self.blobs = None
+        self.blob_array = None
         self.Qh = Qh
         self.Qk = Qk
         self.Ql = Ql
@@ -261,25 +381,16 @@ class NXReduce(QtCore.QObject):
             self._logger = logging.getLogger(
                 f"{self.label}/{self.sample}_{self.scan}['{self.entry_name}']")
             self._logger.setLevel(logging.DEBUG)
-            formatter = logging.Formatter(
-                "%(asctime)s %(name)-12s: %(message)s",
-                datefmt='%Y-%m-%d %H:%M:%S')
-            for handler in self._logger.handlers:
-                self._logger.removeHandler(handler)
-            if os.path.exists(
-                    os.path.join(self.task_directory, 'nxlogger.pid')):
-                socketHandler = logging.handlers.SocketHandler(
-                    'localhost', logging.handlers.DEFAULT_TCP_LOGGING_PORT)
-                self._logger.addHandler(socketHandler)
-            else:
-                fileHandler = logging.FileHandler(os.path.join(
-                    self.task_directory,
-                    'nxlogger.log'))
-                fileHandler.setFormatter(formatter)
-                self._logger.addHandler(fileHandler)
-            if not self.gui:
-                streamHandler = logging.StreamHandler()
-                self._logger.addHandler(streamHandler)
+            handlers = log_handlers(
+                self.task_directory,
+                socket=os.path.exists(
+                    os.path.join(self.task_directory, 'nxlogger.pid')),
+                gui=bool(self.gui))
+            for handler in list(self._logger.handlers):
+                if handler not in handlers:
+                    self._logger.removeHandler(handler)
+            for handler in handlers:
+                self._logger.addHandler(handler)
         return self._logger
 
     @property
@@ -300,6 +411,10 @@ class NXReduce(QtCore.QObject):
                 self.logger.info(str(error))
         return self._server
 
+    @server.setter
+    def server(self, server):
+        self._server = server
+
     @property
     def db(self):
         if self._db is None:
@@ -318,10 +433,9 @@ class NXReduce(QtCore.QObject):
 
     @property
     def entry(self):
-        if self.entry_name in self.root:
-            return self.root[self.entry_name]
-        else:
-            return None
+        if self._entry is None and self.entry_name in self.root:
+            self._entry = self.root[self.entry_name]
+        return self._entry
 
     @property
     def entries(self):
@@ -339,13 +453,13 @@ class NXReduce(QtCore.QObject):
 
     @property
     def data(self):
-        if 'data' in self.entry:
-            return self.entry['data']
-        elif (self.entry_name == 'entry'
-              and 'data' in self.root[self.entries[0]]):
-            return self.root[self.entries[0]]['data']
-        else:
-            return None
+        if self._data_group is None:
+            if 'data' in self.entry:
+                self._data_group = self.entry['data']
+            elif (self.entry_name == 'entry'
+                  and 'data' in self.root[self.entries[0]]):
+                self._data_group = self.root[self.entries[0]]['data']
+        return self._data_group
 
     @property
     def field(self):
@@ -366,7 +480,9 @@ class NXReduce(QtCore.QObject):
 
     @property
     def data_file(self):
-        return self.entry[self._data].nxfilename
+        if self._data_file is None:
+            self._data_file = self.entry[self._data].nxfilename
+        return self._data_file
 
     def data_exists(self):
         return is_hdf5(self.data_file)
@@ -385,6 +501,7 @@ class NXReduce(QtCore.QObject):
     def pixel_mask(self, mask):
         with self.entry.nxfile:
             self.entry['instrument/detector/pixel_mask'] = mask
+        self._pixel_mask = mask
 
     @property
     def parent(self):
@@ -505,7 +622,7 @@ class NXReduce(QtCore.QObject):
     @last.setter
     def last(self, value):
         try:
-            self._last = np.int(value)
+            self._last = int(value)
         except ValueError:
             pass
 
@@ -584,8 +701,15 @@ class NXReduce(QtCore.QObject):
         """Check that a task for all entries in this wrapper file are done."""
         return self.db.task_complete(self.wrapper_file, task)
 
+    @property
+    def processes(self):
+        """Names of the NXprocess groups recording completed tasks."""
+        if self._processes is None:
+            self._processes = set(p.nxname for p in self.entry.NXprocess)
+        return self._processes
+
     def not_processed(self, task):
-        return task not in self.entry or self.overwrite
+        return task not in self.processes or self.overwrite
 
     @property
     def oriented(self):
@@ -651,10 +775,12 @@ class NXReduce(QtCore.QObject):
         with self.root.nxfile:
             if process in self.entry:
                 del self.entry[process]
+            self.processes.discard(process)
             self.entry[process] = NXprocess(
                 program=f'{process}',
-                sequence_index=len(self.entry.NXprocess) + 1,
+                sequence_index=len(self.processes) + 1,
                 version='nxrefine v' + __version__, note=note)
+            self.processes.add(process)
             for key in [k for k in kwargs if k in self.default]:
                 self.entry[process][key] = kwargs[key]
 
@@ -773,18 +899,26 @@ class NXReduce(QtCore.QObject):
                     f"'{self.entry_name}_meta.txt' does not exist")
             return None
         with open(head_file) as f:
-            lines = f.readlines()
-        for line in lines:
-            key, value = line.split(', ')
-            value = value.strip('\n')
-            try:
-                value = np.float(value)
-            except Exception:
-                pass
-            logs[key] = value
-        meta_input = np.genfromtxt(meta_file, delimiter=',', names=True)
-        for i, key in enumerate(meta_input.dtype.names):
-            logs[key] = [array[i] for array in meta_input]
+            for line in f:
+                key, value = line.rstrip('\n').split(', ', 1)
+                try:
+                    value = float(value)
+                except ValueError:
+                    pass
+                logs[key] = value
+        # Only use the slower parser in genfromtxt to validate the column
+        # names and, if necessary, to handle missing values
+        names = np.genfromtxt(meta_file, delimiter=',', names=True,
+                              max_rows=1).dtype.names
+        try:
+            meta_input = np.loadtxt(meta_file, delimiter=',', skiprows=1,
+                                    ndmin=2)
+            columns = [column.copy() for column in meta_input.T]
+        except ValueError:
+            meta_input = np.genfromtxt(meta_file, delimiter=',', names=True)
+            columns = [meta_input[key].copy() for key in names]
+        for key, column in zip(names, columns):
+            logs[key] = column
         return logs
 
     def transfer_logs(self, logs):
@@ -919,14 +1053,24 @@ class NXReduce(QtCore.QObject):
         self.logger.info("Finding maximum counts")
         with self.field.nxfile:
             maximum = 0.0
-            chunk_size = self.field.chunks[0]
-            if chunk_size < 20:
+            if self.field.chunks and self.field.chunks[0] >= 20:
+                chunk_size = self.field.chunks[0]
+            else:
                 chunk_size = 50
             if self.first is None:
                 self.first = 0
             if self.last is None:
                 self.last = self.nframes
             data = self.field.nxfile[self.path]
+            mapped_data = memory_mapped(data)
+            if mapped_data is not None:
+                data = mapped_data
+            elif data.chunks is not None:
+                # Cache a complete layer of chunks so that chunks spanning
+                # two successive reads are only decompressed once
+                frame_size = (self.shape[1] * self.shape[2]
+                              * data.dtype.itemsize)
+                data = chunk_cached(data, data.chunks[0] * frame_size)
             fsum = np.zeros(self.nframes, dtype=np.float64)
             pixel_mask = self.pixel_mask
             # Add constantly firing pixels to the mask
@@ -938,29 +1082,65 @@ class NXReduce(QtCore.QObject):
             mask = np.zeros((self.shape[1], self.shape[2]), dtype=np.int8)
             mask[np.where(pixel_max == pixel_mean)] = 1
             mask[np.where(pixel_mean < 100)] = 0
-            pixel_mask = pixel_mask | mask
+            if pixel_mask is None:
+                pixel_mask = mask
+            else:
+                pixel_mask = pixel_mask | mask
             self.pixel_mask = pixel_mask
-            # Start looping over the data
+            if pixel_mask.any():
+                masked_pixels = pixel_mask.astype(bool)
+            else:
+                masked_pixels = None
+
+            # Read chunks alternately into two preallocated buffers, so
+            # that one can be filled while the other is processed
+            buffers = [np.empty((chunk_size, self.shape[1], self.shape[2]),
+                                dtype=data.dtype) for _ in range(2)]
+            # Unfiltered chunks spanning whole frames are copied directly
+            # from the file without an HDF5 selection
+            direct_chunks = (
+                not isinstance(data, np.ndarray)
+                and data.chunks == buffers[0].shape
+                and data.id.get_create_plist().get_nfilters() == 0)
+
+            def read_chunk(i):
+                n = min(chunk_size, self.nframes - i)
+                buffer = buffers[(i // chunk_size) % 2]
+                if isinstance(data, np.ndarray):
+                    buffer[:n] = data[i:i+n]
+                    return buffer[:n]
+                elif direct_chunks and i % chunk_size == 0:
+                    filter_mask, chunk = data.id.read_direct_chunk((i, 0, 0))
+                    # Only use the raw bytes if no filter was applied
+                    if filter_mask == 0 and len(chunk) == buffer.nbytes:
+                        buffer[:n] = np.frombuffer(
+                            chunk, dtype=data.dtype).reshape(buffer.shape)[:n]
+                        return buffer[:n]
+                data.read_direct(buffer, np.s_[i:i+n], np.s_[:n])
+                return buffer[:n]
+
+            # Start looping over the data, reading the next chunk in a
+            # separate thread while the current chunk is processed
             tic = self.start_progress(self.first, self.last)
-            for i in range(self.first, self.last, chunk_size):
-                if self.stopped:
-                    return None
-                self.update_progress(i)
-                try:
-                    v = data[i:i+chunk_size, :, :]
-                except IndexError as error:
-                    pass
-                if i == self.first:
-                    vsum = v.sum(0)
-                else:
-                    vsum += v.sum(0)
-                if pixel_mask is not None:
-                    v = np.ma.masked_array(v)
-                    v.mask = pixel_mask
-                fsum[i:i+chunk_size] = v.sum((1, 2))
-                if maximum < v.max():
-                    maximum = v.max()
-                del v
+            with ThreadPoolExecutor(max_workers=1) as executor:
+                future = executor.submit(read_chunk, self.first)
+                for i in range(self.first, self.last, chunk_size):
+                    if self.stopped:
+                        return None
+                    self.update_progress(i)
+                    v = future.result()
+                    if i + chunk_size < self.last:
+                        future = executor.submit(read_chunk, i+chunk_size)
+                    if i == self.first:
+                        vsum = v.sum(0)
+                    else:
+                        vsum += v.sum(0)
+                    # Zero masked pixels in place instead of using a masked
+                    # array, so that NaN or infinite values are also removed
+                    if masked_pixels is not None:
+                        v[:, masked_pixels] = 0
+                    fsum[i:i+chunk_size] = v.sum((1, 2))
+                    maximum = max(maximum, v.max())
         if pixel_mask is not None:
             vsum = np.ma.masked_array(vsum)
             vsum.mask = pixel_mask
@@ -971,6 +1151,9 @@ class NXReduce(QtCore.QObject):
         return maximum
 
     def write_maximum(self, maximum):
+        # Integrate the summed data before the wrapper file is opened for
+        # writing, so that the file is not held during the calculation
+        radial_sums = self.calculate_radial_sums()
         with self.root.nxfile:
             self.entry['data'].attrs['maximum'] = maximum
             self.entry['data'].attrs['first'] = self.first
@@ -983,7 +1166,14 @@ class NXReduce(QtCore.QObject):
                 del self.entry['summed_frames']
             self.entry['summed_frames'] = NXdata(self.summed_frames,
                                                  self.entry['data'].nxaxes[0])
-            self.calculate_radial_sums()
+            if radial_sums is not None:
+                radial_sum, polarization = radial_sums
+                if 'radial_sum' in self.entry:
+                    del self.entry['radial_sum']
+                self.entry['radial_sum'] = radial_sum
+                if 'polarization' in self.entry['instrument/detector']:
+                    del self.entry['instrument/detector/polarization']
+                self.entry['instrument/detector/polarization'] = polarization
         self.clear_parameters(['first', 'last'])
 
     def calculate_radial_sums(self):
@@ -1010,15 +1200,11 @@ class NXReduce(QtCore.QObject):
                 correctSolidAngle=True, method=('no', 'histogram', 'cython'))
             Q = (4 * np.pi * np.sin(np.radians(polar_angle) / 2.0)
                  / (ai.wavelength * 1e10))
-            if 'radial_sum' in self.entry:
-                del self.entry['radial_sum']
-            self.entry['radial_sum'] = NXdata(
+            radial_sum = NXdata(
                 NXfield(intensity, name='radial_sum'),
                 NXfield(polar_angle, name='polar_angle', units='degrees'),
                 Q=NXfield(Q, name='Q', units='Ang-1'))
-            if 'polarization' in self.entry['instrument/detector']:
-                del self.entry['instrument/detector/polarization']
-            self.entry['instrument/detector/polarization'] = polarization
+            return radial_sum, polarization
         except Exception as error:
             self.logger.info("Unable to create radial sum")
             self.logger.info(str(error))
@@ -1038,8 +1224,6 @@ class NXReduce(QtCore.QObject):
                     self.stop.emit()
                 elif peaks:
                     self.write_peaks(peaks)
-                    self.write_parameters(threshold=self.threshold,
-                                          first=self.first, last=self.last)
                     self.record('nxfind', threshold=self.threshold,
                                 first=self.first, last=self.last,
                                 peak_number=len(peaks))
@@ -1057,46 +1241,56 @@ class NXReduce(QtCore.QObject):
         self.logger.info("Finding peaks")
 
         tic = self.start_progress(self.first, self.last)
-        self.blobs = []
+        data_file, data_path = self.field.nxfilename, self.field.nxfilepath
+        first, last, nframes = self.first, self.last, self.nframes
+        threshold, min_pixels = self.threshold, self.min_pixels
+        pixel_mask = self.pixel_mask
+        slabs = {}
         with ProcessPoolExecutor(max_workers=self.process_count) as executor:
             futures = []
-            for i in range(self.first, self.last+1, 50):
-                j, k = i - min(5, i), min(i+55, self.last+5, self.nframes)
+            for i in range(first, last+1, 50):
+                j, k = i - min(5, i), min(i+55, last+5, nframes)
                 futures.append(executor.submit(
-                    peak_search, self.field.nxfilename, self.field.nxfilepath,
-                    i, j, k, self.threshold))
+                    peak_search, data_file, data_path, i, j, k, threshold,
+                    pixel_mask))
             for future in as_completed(futures):
                 z, blobs = future.result()
-                self.blobs += [b for b in blobs if b.z >= z
-                               and b.z < min(z+50, self.last)
-                               and b.is_valid(self.pixel_mask, self.min_pixels)
-                               ]
+                if len(blobs) > 0:
+                    blobs = blobs[(blobs[:, 25] >= z)
+                                  & (blobs[:, 25] < min(z+50, last))]
+                    blobs = blobs[valid_blobs(blobs, pixel_mask, min_pixels)]
+                    slabs[z] = blobs[np.argsort(blobs[:, 25], kind='stable')]
                 self.update_progress(z)
                 futures.remove(future)
 
-        peaks = sorted([b for b in self.blobs], key=operator.attrgetter('z'))
+        # Each slab covers a distinct range of z-values, so concatenating
+        # the sorted slabs in order sorts all the peaks
+        if slabs:
+            self.blob_array = np.concatenate([slabs[z] for z in sorted(slabs)])
+        else:
+            self.blob_array = np.empty((0, 32))
+        # Converting the rows to lists first avoids indexing NumPy arrays
+        # for each NXBlob attribute
+        self.blobs = [NXBlob(b) for b in self.blob_array.tolist()]
+        peaks = self.blobs
 
         toc = self.stop_progress()
         self.logger.info(f"{len(peaks)} peaks found ({toc - tic:g} seconds)")
         return peaks
 
     def write_peaks(self, peaks):
+        if peaks is self.blobs:
+            fields = blob_fields(self.blob_array)
+        else:
+            names = ('npixels', 'intensity', 'x', 'y', 'z', 'sigx', 'sigy',
+                     'sigz', 'covxy', 'covyz', 'covzx')
+            attributes = operator.attrgetter('np', *names[1:])
+            peak_array = np.array([attributes(peak) for peak in peaks],
+                                  dtype=[(name, float) for name in names])
+            fields = {name: peak_array[name] for name in names}
         group = NXreflections()
-        group['npixels'] = NXfield([peak.np for peak in peaks], dtype=float)
-        group['intensity'] = NXfield([peak.intensity for peak in peaks],
-                                     dtype=float)
-        group['x'] = NXfield([peak.x for peak in peaks], dtype=float)
-        group['y'] = NXfield([peak.y for peak in peaks], dtype=float)
-        group['z'] = NXfield([peak.z for peak in peaks], dtype=float)
-        group['sigx'] = NXfield([peak.sigx for peak in peaks], dtype=float)
-        group['sigy'] = NXfield([peak.sigy for peak in peaks], dtype=float)
-        group['sigz'] = NXfield([peak.sigz for peak in peaks], dtype=float)
-        group['covxy'] = NXfield([peak.covxy for peak in peaks], dtype=float)
-        group['covyz'] = NXfield([peak.covyz for peak in peaks], dtype=float)
-        group['covzx'] = NXfield([peak.covzx for peak in peaks], dtype=float)
-        group.attrs['first'] = self.first
-        group.attrs['last'] = self.last
-        group.attrs['threshold'] = self.threshold
+        for name in fields:
+            group[name] = NXfield(fields[name])
         with self.root.nxfile:
             if 'peaks' in self.entry:
                 del self.entry['peaks']
@@ -1105,7 +1299,8 @@ class NXReduce(QtCore.QObject):
             polar_angles, azimuthal_angles = refine.calculate_angles(refine.xp,
                                                                      refine.yp)
             refine.write_angles(polar_angles, azimuthal_angles)
-        self.clear_parameters(['threshold', 'first', 'last'])
+        self.write_parameters(threshold=self.threshold,
+                              first=self.first, last=self.last)
 
     def nxrefine(self):
         if self.not_processed('nxrefine') and self.refine:
@@ -1202,14 +1397,16 @@ class NXReduce(QtCore.QObject):
         mask_root['entry/mask'] = (
             NXfield(shape=self.shape, dtype=np.int8, fillvalue=0))
 
+        data_file, data_path = self.field.nxfilename, self.field.nxfilepath
+        first, last, nframes = self.first, self.last, self.nframes
+        pixel_mask = self.pixel_mask
         with ProcessPoolExecutor(max_workers=self.process_count) as executor:
             futures = []
-            for i in range(self.first, self.last+1, 10):
-                j, k = i - min(1, i), min(i+11, self.last+1, self.nframes)
+            for i in range(first, last+1, 10):
+                j, k = i - min(1, i), min(i+11, last+1, nframes)
                 futures.append(executor.submit(
-                    mask_volume, self.field.nxfilename, self.field.nxfilepath,
-                    mask_root.nxfilename, 'entry/mask', i, j, k,
-                    self.pixel_mask, t1, h1, t2, h2))
+                    mask_volume, data_file, data_path, mask_root.nxfilename,
+                    'entry/mask', i, j, k, pixel_mask, t1, h1, t2, h2))
             for future in as_completed(futures):
                 k = future.result()
                 self.update_progress(k)
@@ -1862,9 +2059,11 @@ class NXMultiReduce(NXReduce):
         Z, Y, X = np.meshgrid(self.Ql * self.refine.cstar,
                               self.Qk * self.refine.bstar,
                               self.Qh * self.refine.astar,
-                              indexing='ij')
-        taper = np.ones(X.shape, dtype=np.float32)
-        R = 2 * np.sqrt(X**2 + Y**2 + Z**2) / qmax
+                              indexing='ij', sparse=True)
+        R = X**2 + Y**2 + Z**2
+        np.sqrt(R, out=R)
+        R *= 2.0 / qmax
+        taper = np.ones(R.shape, dtype=np.float32)
         idx = (R > 1.0) & (R < 2.0)
         taper[idx] = 0.5 * (1 - np.cos(R[idx] * np.pi))
         taper[R >= 2.0] = taper.min()
@@ -1924,7 +2123,9 @@ class NXMultiReduce(NXReduce):
         mask = ((((ml-2*dlp)/dlp)**2+((mk-2*dkp)/dkp)
                 ** 2+((mh-2*dhp)/dhp)**2) <= 1)
         mask_array = np.where(mask == 0, 0, 1)
-        mask_indices = [list(idx) for idx in list(np.argwhere(mask == 1))]
+        # Julia arrays are column-major with one-based indices
+        mask_indices = np.ravel_multi_index(
+            np.nonzero(mask), mask.shape, order='F').astype(np.int64) + 1
         return mask_array, mask_indices
 
     @property
@@ -1964,9 +2165,7 @@ class NXMultiReduce(NXReduce):
         symm_root = nxload(self.symm_file, 'rw')
         symm_data = symm_root['entry/data/data']
 
-        mask, mask_indices = self.hole_mask()
-        idx = [Main.CartesianIndex(int(i[0]+1), int(i[1]+1), int(i[2]+1))
-               for i in mask_indices]
+        mask, idx = self.hole_mask()
         ml = int((mask.shape[0]-1)/2)
         mk = int((mask.shape[1]-1)/2)
         mh = int((mask.shape[2]-1)/2)
@@ -2097,6 +2296,7 @@ class NXMultiReduce(NXReduce):
                     del entry['nxtransform']
                 if 'nxmasked_transform' in entry:
                     del entry['nxmasked_transform']
+        self._processes = None
         self.db.update_file(self.wrapper_file)
 
     def nxreduce(self):
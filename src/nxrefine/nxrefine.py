@@ -1261,18 +1261,16 @@ class NXRefine(object):
 
     def calculate_angles(self, x, y):
         """Return the polar and azimuthal angles of the specified pixels."""
-        Oimat = inv(self.Omat)
-        Mat = self.pixel_size * inv(self.Dmat) * Oimat
-        polar_angles = []
-        azimuthal_angles = []
-        for i in range(len(x)):
-            peak = Oimat * (vec(x[i], y[i]) - self.Cvec)
-            v = norm(Mat * peak)
-            polar_angle = np.arctan(v / self.distance)
-            polar_angles.append(polar_angle)
-            azimuthal_angles.append(np.arctan2(-peak[1, 0], peak[2, 0]))
-        return (np.array(polar_angles) * degrees,
-                np.array(azimuthal_angles) * degrees)
+        Oimat = np.asarray(inv(self.Omat))
+        Mat = self.pixel_size * np.asarray(inv(self.Dmat)) @ Oimat
+        x, y = np.asarray(x, dtype=float), np.asarray(y, dtype=float)
+        # Each column contains the coordinates of a single peak
+        peaks = Oimat @ (np.stack((x, y, np.zeros_like(x)))
+                         - np.asarray(self.Cvec))
+        v = norm(Mat @ peaks, axis=0)
+        polar_angles = np.arctan(v / self.distance)
+        azimuthal_angles = np.arctan2(-peaks[1], peaks[2])
+        return polar_angles * degrees, azimuthal_angles * degrees
 
     def angle_peaks(self, i, j):
         """Return the angle between two peaks in degrees.
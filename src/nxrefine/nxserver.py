@@ -9,16 +9,18 @@
 import os
 import subprocess
 import time
+from contextlib import nullcontext
 from datetime import datetime
 from threading import Thread
 from queue import Queue
 
 import psutil
-from nexusformat.nexus import NeXusError, NXLock
+from nexusformat.nexus import NeXusError
 from persistqueue import Queue as FileQueue
 from persistqueue.serializers import json
 
 from .nxdaemon import NXDaemon
+from .nxlock import NXFileLock
 from .nxsettings import NXSettings
 
 
@@ -40,32 +42,43 @@ class NXQueue(Queue):
 
 
 class NXFileQueue(FileQueue):
-    """A file-based queue with locked access"""
+    """A file-based queue with locked access
 
-    def __init__(self, directory, autosave=True):
+    If `locked` is True, the caller already holds the lock on the queue
+    directory, so the queue's own operations do not acquire it again.
+    """
+
+    def __init__(self, directory, autosave=True, locked=False):
         self.directory = directory
         tempdir = os.path.join(directory, 'tempdir')
         self.lockfile = os.path.join(directory, 'filequeue')
+        self.locked = locked
         if not os.path.exists(tempdir):
             os.makedirs(tempdir)
-        with NXLock(self.lockfile):
+        with self.lock():
             super().__init__(directory, serializer=json, autosave=autosave,
                              tempdir=tempdir)
             self.fix_access()
 
+    def lock(self):
+        if self.locked:
+            return nullcontext()
+        else:
+            return NXFileLock(self.lockfile)
+
     def put(self, item, block=True, timeout=None):
-        with NXLock(self.lockfile):
+        with self.lock():
             super().put(item, block=block, timeout=timeout)
             self.fix_access()
 
     def get(self, block=True, timeout=None):
-        with NXLock(self.lockfile):
+        with self.lock():
             item = super().get(block=block, timeout=timeout)
             self.fix_access()
         return item
 
     def queued_items(self):
-        with NXLock(self.lockfile):
+        with self.lock():
             items = []
             while self.qsize() > 0:
                 items.append(super().get(timeout=0))
@@ -251,12 +264,22 @@ class NXServer(NXDaemon):
         super(NXServer, self).stop()
 
     def add_task(self, tasks):
-        """Add a task to the server queue"""
+        """Add tasks to the server queue, unless they are already queued
+
+        The queue is reopened while holding its lock, so that tasks added
+        or removed by other processes since this server was created are
+        taken into account.
+        """
         if isinstance(tasks, str):
             tasks = tasks.split('\n')
-        for task in tasks:
-            if task not in self.queued_tasks():
-                self.task_queue.put(task)
+        with NXFileLock(os.path.join(self.queue_directory, 'filequeue')):
+            queue = NXFileQueue(self.queue_directory, locked=True)
+            queued = NXFileQueue(self.queue_directory, autosave=False,
+                                 locked=True).queued_items()
+            for task in tasks:
+                if task not in queued:
+                    queue.put(task)
+                    queued.append(task)
 
     def read_task(self):
         if self.task_queue.qsize() > 0:
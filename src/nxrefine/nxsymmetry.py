@@ -13,27 +13,67 @@ import numpy as np
 from nexusformat.nexus import nxload, nxsetlock
 
 
+def add_flipped(outarr, axes=None):
+    """Add the array reversed along the given axes to itself in place.
+
+    The sum is unchanged by the reversal, so only the lower half along
+    the first axis is calculated, and the upper half is filled with a
+    reversed copy. This avoids a temporary copy of the whole array.
+
+    Parameters
+    ----------
+    outarr : array-like
+        Array to be symmetrized
+    axes : int or tuple of ints, optional
+        Axes along which the array is reversed, by default all of them
+
+    Returns
+    -------
+    array-like
+        The symmetrized array
+    """
+    if axes is None:
+        axes = tuple(range(outarr.ndim))
+    elif isinstance(axes, int):
+        axes = (axes,)
+    n = outarr.shape[axes[0]]
+    h = n // 2
+
+    def index(i):
+        idx = [slice(None)] * outarr.ndim
+        idx[axes[0]] = i
+        return tuple(idx)
+
+    flipped = np.flip(outarr, axes)
+    half = outarr[index(slice(0, h))] + flipped[index(slice(0, h))]
+    outarr[index(slice(n-h, n))] = np.flip(half, axes)
+    outarr[index(slice(0, h))] = half
+    if n % 2:
+        outarr[index(h)] += flipped[index(h)]
+    return outarr
+
+
 def triclinic(data):
     """Laue group: -1"""
     outarr = np.nan_to_num(data)
-    outarr += np.flip(outarr)
+    add_flipped(outarr)
     return outarr
 
 
 def monoclinic(data):
     """Laue group: 2/m"""
     outarr = np.nan_to_num(data)
-    outarr += np.rot90(outarr, 2, (0, 2))
-    outarr += np.flip(outarr, 0)
+    add_flipped(outarr, (0, 2))
+    add_flipped(outarr, 0)
     return outarr
 
 
 def orthorhombic(data):
     """Laue group: mmm"""
     outarr = np.nan_to_num(data)
-    outarr += np.flip(outarr, 0)
-    outarr += np.flip(outarr, 1)
-    outarr += np.flip(outarr, 2)
+    add_flipped(outarr, 0)
+    add_flipped(outarr, 1)
+    add_flipped(outarr, 2)
     return outarr
 
 
@@ -41,8 +81,8 @@ def tetragonal1(data):
     """Laue group: 4/m"""
     outarr = np.nan_to_num(data)
     outarr += np.rot90(outarr, 1, (1, 2))
-    outarr += np.rot90(outarr, 2, (1, 2))
-    outarr += np.flip(outarr, 0)
+    add_flipped(outarr, (1, 2))
+    add_flipped(outarr, 0)
     return outarr
 
 
@@ -50,17 +90,17 @@ def tetragonal2(data):
     """Laue group: 4/mmm"""
     outarr = np.nan_to_num(data)
     outarr += np.rot90(outarr, 1, (1, 2))
-    outarr += np.rot90(outarr, 2, (1, 2))
-    outarr += np.rot90(outarr, 2, (0, 1))
-    outarr += np.flip(outarr, 0)
+    add_flipped(outarr, (1, 2))
+    add_flipped(outarr, (0, 1))
+    add_flipped(outarr, 0)
     return outarr
 
 
 def hexagonal(data):
     """Laue group: 6/m, 6/mmm (modeled as 2/m along the c-axis)"""
     outarr = np.nan_to_num(data)
-    outarr += np.rot90(outarr, 2, (1, 2))
-    outarr += np.flip(outarr, 0)
+    add_flipped(outarr, (1, 2))
+    add_flipped(outarr, 0)
     return outarr
 
 
@@ -69,10 +109,13 @@ def cubic(data):
     outarr = np.nan_to_num(data)
     outarr += (np.transpose(outarr, axes=(1, 2, 0)) +
                np.transpose(outarr, axes=(2, 0, 1)))
-    outarr += np.transpose(outarr, axes=(0, 2, 1))
-    outarr += np.flip(outarr, 0)
-    outarr += np.flip(outarr, 1)
-    outarr += np.flip(outarr, 2)
+    # Adding the transpose of each plane only needs a temporary copy of
+    # one plane rather than of the whole array
+    for plane in outarr:
+        plane += plane.T
+    add_flipped(outarr, 0)
+    add_flipped(outarr, 1)
+    add_flipped(outarr, 2)
     return outarr
 
 
@@ -88,8 +131,7 @@ def symmetrize_entries(symm_function, data_type, data_file, data_path):
                 data = data_root[entry][data_path].nxweights.nxvalue
             else:
                 signal = data_root[entry][data_path].nxsignal.nxvalue
-                data = np.zeros(signal.shape, dtype=signal.dtype)
-                data[np.where(signal > 0)] = 1
+                data = (signal > 0).astype(signal.dtype)
         else:
             if data_type == 'signal':
                 data += data_root[entry][data_path].nxsignal.nxvalue
@@ -107,9 +149,9 @@ def symmetrize_data(symm_function, data_type, data_file, data_path):
     if data_type == 'signal':
         data = data_root[data_path].nxvalue
     else:
-        signal = data_root[data_path].nxvalue
-        data = np.zeros(signal.shape, signal.dtype)
-        data[np.where(signal > 0)] = 1
+        # The weights count the symmetry-equivalent pixels with data, so
+        # they fit in one byte, since there are at most 48 operations
+        data = (data_root[data_path].nxvalue > 0).astype(np.uint8)
     result = symm_function(data)
     root = nxload(tempfile.mkstemp(suffix='.nxs')[1], mode='w')
     root['data'] = result
@@ -158,6 +200,9 @@ class NXSymmetry(object):
             else:
                 weights = result_root['data'].nxvalue
             os.remove(result_file)
-        with np.errstate(divide='ignore', invalid='ignore'):
-            result = np.where(weights > 0, signal / weights, 0.0)
+        # Only divide where the weights are positive, writing directly into
+        # the zero-filled result
+        result = np.zeros(signal.shape, dtype=np.result_type(signal, weights,
+                                                             np.float32))
+        np.divide(signal, weights, out=result, where=weights > 0)
         return result
@@ -1,11 +1,12 @@
 import os
 
+import h5py
 import numpy as np
 from ImageD11.labelimage import flip1, labelimage
 from nexusformat.nexus import nxload, nxsetlock
 
 
-def peak_search(data_file, data_path, i, j, k, threshold):
+def peak_search(data_file, data_path, i, j, k, threshold, mask=None):
     """Identify peaks in the slab of raw data
 
     Parameters
@@ -22,29 +23,32 @@ def peak_search(data_file, data_path, i, j, k, threshold):
         Index of last z-value of processed slab
     threshold : float
         Peak threshold
+    mask : array-like, optional
+        2D detector mask, by default None. Values of 1 represent masked
+        pixels, which are set to zero before the peak search.
 
     Returns
     -------
-    list of NXBlobs
-        Peak locations and intensities stored in NXBlob instances
+    int, array-like
+        Index of the first z-value and an array of peak properties, with
+        one row per peak.
     """
     global saved_blobs
     nxsetlock(600)
 
     def save_blobs(lio, blobs):
-        for b in blobs:
-            if b[0] < 0.1:
-                continue
-            lio.spot3d_id += 1
-            blob = NXBlob(b)
-            if blob.np > 0.0:
-                saved_blobs.append(blob)
+        blobs = np.asarray(blobs)
+        blobs = blobs[blobs[:, 0] >= 0.1]
+        lio.spot3d_id += len(blobs)
+        saved_blobs.append(blobs)
         if lio.onfirst > 0:
             lio.onfirst = 0
 
     data_root = nxload(data_file, 'r')
     with data_root.nxfile:
         data = data_root[data_path][j:k].nxvalue
+    if mask is not None:
+        data *= (mask == 0).astype(data.dtype)
 
     labelimage.outputpeaks = save_blobs
     lio = labelimage(data.shape[-2:], flipper=flip1, fileout=os.devnull)
@@ -54,13 +58,135 @@ def peak_search(data_file, data_path, i, j, k, threshold):
         lio.peaksearch(data[z], threshold, z)
         lio.mergelast()
     lio.finalise()
-    for blob in saved_blobs:
-        blob.z += j
-    return i, saved_blobs
+    if saved_blobs:
+        blobs = np.concatenate(saved_blobs)
+        blobs[:, 25] += j
+    else:
+        blobs = np.empty((0, 0))
+    return i, blobs
+
+
+def valid_blobs(blobs, mask=None, min_pixels=10):
+    """Identify valid peaks in an array of peak properties.
+
+    This is equivalent to calling `NXBlob.is_valid` on each row, but
+    avoids creating an NXBlob instance for peaks that are rejected.
+
+    Parameters
+    ----------
+    blobs : array-like
+        Peak properties returned by `peak_search`, with one row per peak
+    mask : array-like, optional
+        2D detector mask, by default None. Values of 1 represent masked
+        pixels.
+    min_pixels : int, optional
+        Minimum number of pixels in a valid peak, by default 10
+
+    Returns
+    -------
+    array-like
+        Boolean array that is True for valid peaks
+    """
+    average = blobs[:, 22]
+    valid = ((blobs[:, 0] >= min_pixels) & ~np.isnan(average)
+             & ~np.isclose(average, 0.0))
+    if mask is not None:
+        valid &= (mask[blobs[:, 24].astype(int),
+                       blobs[:, 23].astype(int)] == 0)
+    return valid
+
+
+def blob_fields(blobs):
+    """Return the peak properties of an array of blobs as columns.
+
+    Parameters
+    ----------
+    blobs : array-like
+        Array of blob properties returned by `peak_search`, with one row
+        per peak.
+
+    Returns
+    -------
+    dict
+        Arrays of peak properties, in the order written to the 'peaks'
+        group, with the same definitions as the NXBlob attributes.
+    """
+    return {'npixels': blobs[:, 0],
+            'intensity': blobs[:, 0] * blobs[:, 22],
+            'x': blobs[:, 23],
+            'y': blobs[:, 24],
+            'z': blobs[:, 25],
+            'sigx': blobs[:, 27],
+            'sigy': blobs[:, 26],
+            'sigz': blobs[:, 28],
+            'covxy': blobs[:, 29],
+            'covyz': blobs[:, 30],
+            'covzx': blobs[:, 31]}
+
+
+def chunk_cached(dataset, nbytes, nslots=100003, w0=0.75):
+    """Return the HDF5 dataset reopened with a larger chunk cache.
+
+    The default HDF5 chunk cache is 1 MB, so chunks that are larger than
+    this, or that span the boundaries between successive slab reads, are
+    read and decompressed more than once.
+
+    Parameters
+    ----------
+    dataset : h5py.Dataset
+        Dataset in an open HDF5 file
+    nbytes : int
+        Size of the chunk cache in bytes
+    nslots : int, optional
+        Number of hash table slots in the chunk cache, by default 100003
+    w0 : float, optional
+        Chunk preemption policy, by default 0.75
+
+    Returns
+    -------
+    h5py.Dataset
+        Dataset using the specified chunk cache
+    """
+    if dataset.chunks is None:
+        return dataset
+    dapl = h5py.h5p.create(h5py.h5p.DATASET_ACCESS)
+    dapl.set_chunk_cache(nslots, int(nbytes), w0)
+    return h5py.Dataset(h5py.h5d.open(dataset.file.id,
+                                      dataset.name.encode(), dapl=dapl))
+
+
+def memory_mapped(dataset):
+    """Return a memory map of a contiguous, uncompressed HDF5 dataset.
+
+    Reading a memory-mapped array bypasses the HDF5 library entirely.
+    The array is mapped in copy-on-write mode, so that slabs can be
+    modified in place without changing the file.
+
+    Parameters
+    ----------
+    dataset : h5py.Dataset
+        Dataset in an open HDF5 file
+
+    Returns
+    -------
+    numpy.memmap or None
+        Memory-mapped array, or None if the dataset is chunked,
+        compressed, or not yet allocated
+    """
+    if dataset.chunks is not None or dataset.compression is not None:
+        return None
+    offset = dataset.id.get_offset()
+    if offset is None:
+        return None
+    return np.memmap(dataset.file.filename, dtype=dataset.dtype, mode='c',
+                     offset=offset, shape=dataset.shape)
 
 
 class NXBlob(object):
 
+    __slots__ = ('np', 'average', 'intensity', 'x', 'y', 'z', 'sigx', 'sigy',
+                 'sigz', 'covxy', 'covyz', 'covzx')
+
     def __init__(self, peak):
         self.np = peak[0]
         self.average = peak[22]
@@ -141,9 +267,15 @@ def local_sum(X, K):
     for i in range(d):
         zeros_shape = list(G.shape)
         zeros_shape[i] = K.shape[i]
-        G_1 = np.concatenate([G, np.zeros(zeros_shape)], axis=i)
-        G_2 = np.concatenate([np.zeros(zeros_shape), G], axis=i)
-        G = np.cumsum(G_1-G_2, axis=i)
+        # The sum over each window is the difference between two values
+        # of a single cumulative sum, offset by the window length
+        G = np.cumsum(np.concatenate([G, np.zeros(zeros_shape)], axis=i),
+                      axis=i)
+        upper = [slice(None)] * d
+        lower = [slice(None)] * d
+        upper[i] = slice(K.shape[i], None)
+        lower[i] = slice(None, -K.shape[i])
+        G[tuple(upper)] -= G[tuple(lower)]
     G = G[tuple(slice(None, -1, None) for _ in range(d))]
     return G
 
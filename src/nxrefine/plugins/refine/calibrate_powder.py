@@ -6,17 +6,14 @@
 # The full license is in the file COPYING, distributed with this software.
 # -----------------------------------------------------------------------------
 
+from functools import lru_cache
+
 import numpy as np
-import pyFAI
 from nexpy.gui.datadialogs import GridParameters, NXDialog
 from nexpy.gui.plotview import NXPlotView, plotviews
 from nexpy.gui.utils import confirm_action, load_image, report_error
 from nexusformat.nexus import (NeXusError, NXcollection, NXdata, NXfield,
                                NXprocess)
-from pyFAI.azimuthalIntegrator import AzimuthalIntegrator
-from pyFAI.calibrant import ALL_CALIBRANTS
-from pyFAI.geometryRefinement import GeometryRefinement
-from pyFAI.massif import Massif
 
 
 def show_dialog():
@@ -27,6 +24,14 @@ def show_dialog():
         report_error("Calibrating Powder", error)
 
 
+@lru_cache(maxsize=None)
+def calibrant_names():
+    """Return the sorted names of the calibrants defined by pyFAI."""
+    from pyFAI.calibrant import ALL_CALIBRANTS
+    cstr = str(ALL_CALIBRANTS)
+    return sorted(cstr[cstr.index(':')+2:].split(', '))
+
+
 class CalibrateDialog(NXDialog):
 
     def __init__(self, parent=None):
@@ -35,6 +40,7 @@ class CalibrateDialog(NXDialog):
         self.plotview = None
         self.data = None
         self.counts = None
+        self._massif = None
         self.points = []
         self.pattern_geometry = None
         self.cake_geometry = None
@@ -42,10 +48,8 @@ class CalibrateDialog(NXDialog):
         self.is_calibrated = False
         self.phi_max = -np.pi
 
-        cstr = str(ALL_CALIBRANTS)
-        calibrants = sorted(cstr[cstr.index(':')+2:].split(', '))
         self.parameters = GridParameters()
-        self.parameters.add('calibrant', calibrants, 'Calibrant')
+        self.parameters.add('calibrant', calibrant_names(), 'Calibrant')
         self.parameters['calibrant'].value = 'CeO2'
         self.parameters.add('wavelength', 0.5, 'Wavelength (Ang)', False)
         self.parameters.add('distance', 100.0, 'Detector Distance (mm)', True)
@@ -66,6 +70,7 @@ class CalibrateDialog(NXDialog):
         if powder_file:
             self.data = load_image(powder_file)
             self.counts = self.data.nxsignal.nxvalue
+            self._massif = None
             self.plot_data()
 
     def choose_entry(self):
@@ -101,10 +106,18 @@ class CalibrateDialog(NXDialog):
         if 'calibration' in self.entry['instrument']:
             self.data = self.entry['instrument/calibration']
             self.counts = self.data.nxsignal.nxvalue
+            self._massif = None
             self.plot_data()
         else:
             self.close_plots()
 
+    @property
+    def massif(self):
+        if self._massif is None:
+            from pyFAI.massif import Massif
+            self._massif = Massif(self.counts)
+        return self._massif
+
     @property
     def search_size(self):
         return int(self.parameters['search_size'].value)
@@ -168,20 +181,21 @@ class CalibrateDialog(NXDialog):
         xc, yc = self.parameters['xc'].value, self.parameters['yc'].value
         wavelength = self.parameters['wavelength'].value
         distance = self.parameters['distance'].value * 1e-3
+        x_max, y_max = self.data.x.max(), self.data.y.max()
+        d_spacing = self.calibrant.dSpacing
+        completed_rings = set(p[3] for p in self.points)
         self.start_progress((0, self.selected_ring+1))
         for ring in range(self.selected_ring+1):
             self.update_progress(ring)
-            if len([p for p in self.points if p[3] == ring]) > 0:
+            if ring in completed_rings:
                 continue
             self.ring = ring
-            theta = 2 * np.arcsin(wavelength /
-                                  (2*self.calibrant.dSpacing[ring]))
+            theta = 2 * np.arcsin(wavelength / (2*d_spacing[ring]))
             r = distance * np.tan(theta) / self.pixel_size
             phi = self.phi_max = -np.pi
             while phi < np.pi:
-                x, y = np.int(xc + r*np.cos(phi)), np.int(yc + r*np.sin(phi))
-                if ((x > 0 and x < self.data.x.max()) and
-                    (y > 0 and y < self.data.y.max()) and
+                x, y = int(xc + r*np.cos(phi)), int(yc + r*np.sin(phi))
+                if ((x > 0 and x < x_max) and (y > 0 and y < y_max) and
                         not self.pixel_mask[y, x]):
                     self.add_points(x, y, phi)
                     phi = self.phi_max + 0.2
@@ -194,8 +208,7 @@ class CalibrateDialog(NXDialog):
         idx, idy = self.find_peak(x, y)
         points = [(idy, idx)]
         circles = []
-        massif = Massif(self.counts)
-        extra_points = massif.find_peaks((idy, idx))
+        extra_points = self.massif.find_peaks((idy, idx))
         for point in extra_points:
             points.append(point)
             circles.append(self.circle(point[1], point[0], alpha=0.3))
@@ -214,10 +227,8 @@ class CalibrateDialog(NXDialog):
         if top < 0:
             top = 0
         region = self.counts[top:(top+s), left:(left+s)]
-        idy, idx = np.where(region == region.max())
-        idx = left + idx[0]
-        idy = top + idy[0]
-        return idx, idy
+        idy, idx = np.unravel_index(np.argmax(region), region.shape)
+        return left + int(idx), top + int(idy)
 
     def clear_points(self):
         for i, point in enumerate(self.points):
@@ -229,6 +240,7 @@ class CalibrateDialog(NXDialog):
 
     @property
     def calibrant(self):
+        from pyFAI.calibrant import ALL_CALIBRANTS
         return ALL_CALIBRANTS[self.parameters['calibrant'].value]
 
     @property
@@ -250,6 +262,7 @@ class CalibrateDialog(NXDialog):
         self.yc = self.parameters['yc'].value
 
     def calibrate(self):
+        from pyFAI.geometryRefinement import GeometryRefinement
         self.prepare_parameters()
         self.orig_pixel1 = self.pixel_size
         self.orig_pixel2 = self.pixel_size
@@ -280,6 +293,7 @@ class CalibrateDialog(NXDialog):
         self.pattern_geometry.reset()
 
     def create_cake_geometry(self):
+        from pyFAI.azimuthalIntegrator import AzimuthalIntegrator
         self.cake_geometry = AzimuthalIntegrator()
         pyFAI_parameter = self.pattern_geometry.getPyFAI()
         pyFAI_parameter['wavelength'] = self.pattern_geometry.wavelength
@@ -333,6 +347,7 @@ class CalibrateDialog(NXDialog):
         self.parameters.restore_parameters()
 
     def save_parameters(self):
+        import pyFAI
         if not self.is_calibrated:
             raise NeXusError('No refinement performed')
         elif 'calibration' in self.entry['instrument']:
@@ -7,11 +7,16 @@
 # -----------------------------------------------------------------------------
 
 import os
+import re
+import stat
 import subprocess
 import time
+from collections import OrderedDict
+from concurrent.futures import ThreadPoolExecutor
 
+import psutil
 from nexpy.gui.datadialogs import NXDialog, NXWidget
-from nexpy.gui.pyqt import QtCore, QtWidgets
+from nexpy.gui.pyqt import QtCore, QtGui, QtWidgets
 from nexpy.gui.utils import (format_mtime, human_size, natural_sort,
                              report_error)
 from nexpy.gui.widgets import (NXLabel, NXPlainTextEdit, NXPushButton,
@@ -30,6 +35,107 @@ def show_dialog():
         report_error("Managing Workflows", error)
 
 
+def find_log_offset(filename, timestamp):
+    """Return the offset of the first line logged at or after a time.
+
+    Log lines are assumed to start with a '%Y-%m-%d %H:%M:%S' timestamp
+    and to be in chronological order, so the file can be bisected. Lines
+    without a timestamp are treated as being after the target, so the
+    returned offset is never later than the first matching line.
+
+    Parameters
+    ----------
+    filename : str
+        Path to the log file
+    timestamp : float
+        Time in seconds since the epoch
+
+    Returns
+    -------
+    int
+        Offset of the start of the first line at or after the time
+    """
+    target = time.strftime("%Y-%m-%d %H:%M:%S",
+                           time.localtime(timestamp)).encode()
+    stamp = re.compile(rb'\d{4}-\d\d-\d\d \d\d:\d\d:\d\d')
+    with open(filename, 'rb') as f:
+
+        def line_start(offset):
+            f.seek(max(offset - 1, 0))
+            if offset > 0:
+                f.readline()
+            return f.tell()
+
+        low, high = 0, f.seek(0, os.SEEK_END)
+        while low < high:
+            middle = (low + high) // 2
+            line = f.readline() if line_start(middle) < high else b''
+            if line and stamp.match(line) and line[:19] < target:
+                low = middle + 1
+            else:
+                high = middle
+        return line_start(low)
+
+
+def read_last_lines(filename, select, contains=None, max_lines=10000,
+                    block_size=65536, start=0):
+    """Return the last lines of a text file that satisfy a condition.
+
+    The file is read backwards in blocks, so only the end of a large log
+    file is read if it contains enough matching lines.
+
+    Parameters
+    ----------
+    filename : str
+        Path to the text file
+    select : callable
+        Function returning True if a line, without its line ending, should
+        be included
+    contains : str, optional
+        String that selected lines must contain. Other lines are skipped
+        before they are decoded, by default None
+    max_lines : int, optional
+        Maximum number of lines returned, by default 10000
+    block_size : int, optional
+        Number of bytes read at a time, by default 65536
+    start : int, optional
+        Offset of the first line that can be returned, by default 0
+
+    Returns
+    -------
+    list of str
+        Selected lines, in the order they occur in the file, each with a
+        trailing newline
+    """
+    lines = []
+    if contains is not None:
+        contains = contains.encode()
+    with open(filename, 'rb') as f:
+        position = f.seek(0, os.SEEK_END)
+        # Drop the final line ending, so it doesn't yield an empty line
+        if position > start:
+            f.seek(position - 1)
+            if f.read(1) == b'\n':
+                position -= 1
+        tail = b''
+        while position > start and len(lines) < max_lines:
+            size = min(block_size, position - start)
+            position -= size
+            f.seek(position)
+            block = (f.read(size) + tail).split(b'\n')
+            # The first line of the block may be incomplete
+            tail = block.pop(0) if position > start else b''
+            for line in reversed(block):
+                if contains is not None and contains not in line:
+                    continue
+                line = line.decode(errors='replace')
+                if select(line):
+                    lines.append(line + '\n')
+                    if len(lines) == max_lines:
+                        break
+    return lines[::-1]
+
+
 class WorkflowDialog(NXDialog):
 
     def __init__(self, parent=None):
@@ -48,8 +154,15 @@ class WorkflowDialog(NXDialog):
         self.set_title('Manage Workflows')
         self.grid = None
         self.scroll_area = None
+        self.wrapper_files = {}
         self.sample_directory = None
+        self.server = None
+        self.wrapper_cache = OrderedDict()
         self.entries = ['f1', 'f2', 'f3']
+        self.status_slots = {task: self.status_slot(task)
+                             for task in self.tasks}
+        self.palettes = {color: self.status_palette(color)
+                         for color in (None, 'green', 'blue', 'red')}
 
     def choose_directory(self):
         super().choose_directory()
@@ -60,8 +173,17 @@ class WorkflowDialog(NXDialog):
         self.label = os.path.join(os.path.basename(self.sample_directory))
         parent_file = os.path.join(self.sample_directory,
                                    self.sample+'_parent.nxs')
-        if os.path.exists(parent_file):
-            self.parent_file = os.path.realpath(parent_file)
+        try:
+            st = os.lstat(parent_file)
+        except FileNotFoundError:
+            st = None
+        if st is not None:
+            if stat.S_ISLNK(st.st_mode):
+                link = os.readlink(parent_file)
+                self.parent_file = os.path.normpath(
+                    os.path.join(self.sample_directory, link))
+            else:
+                self.parent_file = parent_file
             self.filename.setText(os.path.basename(self.parent_file))
         else:
             self.parent_file = None
@@ -70,11 +192,11 @@ class WorkflowDialog(NXDialog):
             os.path.dirname(self.sample_directory))
         self.mainwindow.default_directory = self.sample_directory
         self.task_directory = os.path.join(self.root_directory, 'tasks')
-        if not os.path.exists(self.task_directory):
-            os.mkdir(self.task_directory)
+        os.makedirs(self.task_directory, exist_ok=True)
         db_file = os.path.join(self.task_directory, 'nxdatabase.db')
         self.db = NXDatabase(db_file)
-        self.server = NXServer()
+        if self.server is None:
+            self.server = NXServer()
         self.update()
 
     def add_grid_headers(self):
@@ -143,151 +265,41 @@ class WorkflowDialog(NXDialog):
         if not self.sample_directory:
             raise NeXusError("No sample directory declared")
 
-        if self.grid:
-            self.delete_grid(self.grid)
-            del self.grid_widget
-
-        if self.scroll_area:
-            self.scroll_area.close()
-            self.scroll_area.deleteLater()
-
         # Map from wrapper files to scan directories
-        wrapper_files = {w: self.get_scan(w) for w in sorted([
-            os.path.join(self.sample_directory, filename)
-            for filename in os.listdir(self.sample_directory)
-            if self.is_valid(filename)], key=natural_sort)}
-        self.grid = QtWidgets.QGridLayout()
-        self.grid_widget = NXWidget()
-        self.grid_widget.set_layout(self.grid, 'stretch')
-        self.scroll_area = NXScrollArea(self.grid_widget)
-        self.scroll_area.setMinimumSize(1250, 300)
-        self.insert_layout(3, self.scroll_area)
-        self.grid.setSpacing(1)
-
-        self.scans = {}
+        with os.scandir(self.sample_directory) as entries:
+            wrapper_paths = sorted(
+                (natural_sort(e.name), e.path) for e in entries
+                if self.is_valid(e.name) and e.is_file())
+        wrapper_files = {w: self.get_scan(w) for _, w in wrapper_paths}
+        if (self.grid is not None and
+                list(wrapper_files) == list(self.wrapper_files)):
+            self.reset_grid()
+        else:
+            self.make_grid(wrapper_files)
+        self.wrapper_files = wrapper_files
         self.scans_backup = {}
 
-        row = 0
-        # Create (unchecked) checkboxes
-        for wrapper_file, scan in wrapper_files.items():
-            scan_label = os.path.basename(scan)
-            status = {}
-            status['scan'] = NXLabel(scan_label)
-            if self.parent_file == wrapper_file:
-                status['scan'].setStyleSheet('font-weight:bold')
-            status['entries'] = []
-            status['data'] = self.new_checkbox()
-            status['link'] = self.new_checkbox()
-            status['copy'] = self.new_checkbox()
-            status['max'] = self.new_checkbox()
-            status['find'] = self.new_checkbox()
-            status['refine'] = self.new_checkbox()
-            status['prepare'] = self.new_checkbox()
-            status['transform'] = self.new_checkbox()
-            status['masked_transform'] = self.new_checkbox()
-            status['combine'] = self.new_checkbox()
-            status['masked_combine'] = self.new_checkbox()
-            status['pdf'] = self.new_checkbox()
-            status['masked_pdf'] = self.new_checkbox()
-            status['overwrite'] = self.new_checkbox(self.select_scans)
-            status['sync'] = self.new_checkbox()
-            self.grid.addWidget(status['scan'], row, 0, QtCore.Qt.AlignCenter)
-            self.grid.addWidget(status['data'], row, 1, QtCore.Qt.AlignCenter)
-            self.grid.addWidget(status['link'], row, 2, QtCore.Qt.AlignCenter)
-            self.grid.addWidget(status['copy'], row, 3, QtCore.Qt.AlignCenter)
-            self.grid.addWidget(status['max'], row, 4, QtCore.Qt.AlignCenter)
-            self.grid.addWidget(status['find'], row, 5, QtCore.Qt.AlignCenter)
-            self.grid.addWidget(
-                status['refine'],
-                row, 6, QtCore.Qt.AlignCenter)
-            self.grid.addWidget(
-                status['prepare'],
-                row, 7, QtCore.Qt.AlignCenter)
-            self.grid.addWidget(
-                status['transform'],
-                row, 8, QtCore.Qt.AlignCenter)
-            self.grid.addWidget(
-                status['masked_transform'],
-                row, 9, QtCore.Qt.AlignCenter)
-            self.grid.addWidget(
-                status['combine'],
-                row, 10, QtCore.Qt.AlignCenter)
-            self.grid.addWidget(
-                status['masked_combine'],
-                row, 11, QtCore.Qt.AlignCenter)
-            self.grid.addWidget(status['pdf'], row, 12, QtCore.Qt.AlignCenter)
-            self.grid.addWidget(
-                status['masked_pdf'],
-                row, 13, QtCore.Qt.AlignCenter)
-            self.grid.addWidget(
-                status['overwrite'],
-                row, 14, QtCore.Qt.AlignCenter)
-            self.grid.addWidget(status['sync'], row, 15, QtCore.Qt.AlignCenter)
-            self.scans[scan] = status
-            row += 1
-        self.grid.addWidget(NXLabel('All'), row, 0, QtCore.Qt.AlignCenter)
-        all_boxes = {}
-        all_boxes['link'] = self.new_checkbox(
-            lambda: self.select_status('link'))
-        all_boxes['copy'] = self.new_checkbox(
-            lambda: self.select_status('copy'))
-        all_boxes['max'] = self.new_checkbox(
-            lambda: self.select_status('max'))
-        all_boxes['find'] = self.new_checkbox(
-            lambda: self.select_status('find'))
-        all_boxes['refine'] = self.new_checkbox(
-            lambda: self.select_status('refine'))
-        all_boxes['prepare'] = self.new_checkbox(
-            lambda: self.select_status('prepare'))
-        all_boxes['transform'] = self.new_checkbox(
-            lambda: self.select_status('transform'))
-        all_boxes['masked_transform'] = self.new_checkbox(
-            lambda: self.select_status('masked_transform'))
-        all_boxes['combine'] = self.new_checkbox(
-            lambda: self.select_status('combine'))
-        all_boxes['masked_combine'] = self.new_checkbox(
-            lambda: self.select_status('masked_combine'))
-        all_boxes['pdf'] = self.new_checkbox(lambda: self.select_status('pdf'))
-        all_boxes['masked_pdf'] = self.new_checkbox(
-            lambda: self.select_status('masked_pdf'))
-        all_boxes['overwrite'] = self.new_checkbox(self.select_all)
-        all_boxes['sync'] = self.new_checkbox(self.select_all)
-        self.grid.addWidget(all_boxes['link'], row, 2, QtCore.Qt.AlignCenter)
-        self.grid.addWidget(all_boxes['copy'], row, 3, QtCore.Qt.AlignCenter)
-        self.grid.addWidget(all_boxes['max'], row, 4, QtCore.Qt.AlignCenter)
-        self.grid.addWidget(all_boxes['find'], row, 5, QtCore.Qt.AlignCenter)
-        self.grid.addWidget(all_boxes['refine'], row, 6, QtCore.Qt.AlignCenter)
-        self.grid.addWidget(all_boxes['prepare'], row, 7,
-                            QtCore.Qt.AlignCenter)
-        self.grid.addWidget(all_boxes['transform'], row, 8,
-                            QtCore.Qt.AlignCenter)
-        self.grid.addWidget(all_boxes['masked_transform'], row, 9,
-                            QtCore.Qt.AlignCenter)
-        self.grid.addWidget(all_boxes['combine'], row, 10,
-                            QtCore.Qt.AlignCenter)
-        self.grid.addWidget(all_boxes['masked_combine'], row, 11,
-                            QtCore.Qt.AlignCenter)
-        self.grid.addWidget(all_boxes['pdf'], row, 12, QtCore.Qt.AlignCenter)
-        self.grid.addWidget(all_boxes['masked_pdf'], row, 13,
-                            QtCore.Qt.AlignCenter)
-        self.grid.addWidget(all_boxes['overwrite'], row, 14,
-                            QtCore.Qt.AlignCenter)
-        self.grid.addWidget(all_boxes['sync'], row, 15, QtCore.Qt.AlignCenter)
-        self.all_scans = all_boxes
+        self.scroll_area.setUpdatesEnabled(False)
+        self.grid_widget.setUpdatesEnabled(False)
         self.start_progress((0, len(wrapper_files)))
 
         # Populate the checkboxes based on the entries in self.db.File
+        files = self.db.get_files(list(wrapper_files))
+        # Database columns use nx* names while columns don't
+        task_columns = [(task_name, task_name[2:])
+                        if task_name.startswith('nx')
+                        else (task_name, task_name)
+                        for task_name in self.db.task_names]
         for i, (wrapper, scan) in enumerate(wrapper_files.items()):
             status = self.scans[scan]
+            if self.parent_file == wrapper:
+                status['scan'].setStyleSheet('font-weight:bold')
+            else:
+                status['scan'].setStyleSheet('')
             status['data'].setEnabled(False)
-            f = self.db.get_file(wrapper)
+            f = files[wrapper]
             status['entries'] = f.get_entries()
-            for task_name in self.db.task_names:
-                # Database columns use nx* names while columns don't
-                if task_name.startswith('nx'):
-                    col_name = task_name[2:]
-                else:
-                    col_name = task_name
+            for task_name, col_name in task_columns:
                 checkbox = status[col_name]
                 file_status = getattr(f, task_name)
                 if file_status == self.db.DONE:
@@ -296,31 +308,99 @@ class WorkflowDialog(NXDialog):
                 elif file_status == self.db.IN_PROGRESS:
                     checkbox.setCheckState(QtCore.Qt.PartiallyChecked)
                     checkbox.setEnabled(True)
-                    checkbox.setStyleSheet("color: green")
+                    checkbox.setPalette(self.palettes['green'])
                 elif file_status == self.db.QUEUED:
                     checkbox.setCheckState(QtCore.Qt.PartiallyChecked)
                     checkbox.setEnabled(True)
-                    checkbox.setStyleSheet("color: blue")
+                    checkbox.setPalette(self.palettes['blue'])
                 elif file_status == self.db.FAILED:
                     checkbox.setCheckState(QtCore.Qt.PartiallyChecked)
                     checkbox.setEnabled(True)
-                    checkbox.setStyleSheet("color: red")
+                    checkbox.setPalette(self.palettes['red'])
             if status['data'].checkState() == QtCore.Qt.Unchecked:
                 for task in ['link', 'max', 'find', 'prepare', 'transform',
                              'masked_transform']:
                     status[task].setEnabled(False)
             self.update_progress(i)
 
+        self.grid_widget.setUpdatesEnabled(True)
+        self.scroll_area.setUpdatesEnabled(True)
+        self.grid_widget.updateGeometry()
         self.stop_progress()
         self.backup_scans()
         return self.grid
 
     def sync_db(self):
-        for scan in self.scans:
-            if self.sync_selected(scan):
-                self.db.update_file(self.get_scan_file(scan))
+        self.db.update_files([self.get_scan_file(scan) for scan in self.scans
+                              if self.sync_selected(scan)])
         self.update()
 
+    def make_grid(self, wrapper_files):
+        if self.grid:
+            self.delete_grid(self.grid)
+            del self.grid_widget
+
+        if self.scroll_area:
+            self.scroll_area.close()
+            self.scroll_area.deleteLater()
+
+        self.grid = QtWidgets.QGridLayout()
+        self.grid_widget = NXWidget()
+        self.grid_widget.set_layout(self.grid, 'stretch')
+        self.scroll_area = NXScrollArea(self.grid_widget)
+        self.scroll_area.setMinimumSize(1250, 300)
+        self.insert_layout(3, self.scroll_area)
+        self.grid.setSpacing(1)
+        self.scroll_area.setUpdatesEnabled(False)
+        self.grid_widget.setUpdatesEnabled(False)
+
+        self.scans = {}
+        columns = ['data'] + self.tasks + ['overwrite', 'sync']
+        row = 0
+        # Create (unchecked) checkboxes
+        for wrapper_file, scan in wrapper_files.items():
+            scan_label = os.path.basename(scan)
+            status = {}
+            status['scan'] = NXLabel(scan_label)
+            status['entries'] = []
+            self.grid.addWidget(status['scan'], row, 0, QtCore.Qt.AlignCenter)
+            for col, column in enumerate(columns, start=1):
+                if column == 'overwrite':
+                    status[column] = self.new_checkbox(self.select_scans)
+                else:
+                    status[column] = self.new_checkbox()
+                self.grid.addWidget(status[column], row, col,
+                                    QtCore.Qt.AlignCenter)
+            self.scans[scan] = status
+            row += 1
+        self.grid.addWidget(NXLabel('All'), row, 0, QtCore.Qt.AlignCenter)
+        all_boxes = {}
+        for col, column in enumerate(columns[1:], start=2):
+            if column == 'overwrite' or column == 'sync':
+                all_boxes[column] = self.new_checkbox(self.select_all)
+            else:
+                all_boxes[column] = self.new_checkbox(
+                    self.status_slots[column])
+            self.grid.addWidget(all_boxes[column], row, col,
+                                QtCore.Qt.AlignCenter)
+        self.all_scans = all_boxes
+
+    def reset_grid(self):
+        columns = ['data'] + self.tasks + ['overwrite', 'sync']
+        for status in self.scans.values():
+            for column in columns:
+                self.reset_checkbox(status[column])
+        for checkbox in self.all_scans.values():
+            self.reset_checkbox(checkbox)
+
+    def status_palette(self, color=None):
+        palette = QtGui.QPalette(QtWidgets.QApplication.palette())
+        if color:
+            for role in (QtGui.QPalette.WindowText, QtGui.QPalette.Text,
+                         QtGui.QPalette.ButtonText):
+                palette.setColor(role, QtGui.QColor(color))
+        return palette
+
     def new_checkbox(self, slot=None):
         checkbox = QtWidgets.QCheckBox()
         checkbox.setCheckState(QtCore.Qt.Unchecked)
@@ -329,6 +409,13 @@ class WorkflowDialog(NXDialog):
             checkbox.stateChanged.connect(slot)
         return checkbox
 
+    def reset_checkbox(self, checkbox):
+        checkbox.blockSignals(True)
+        checkbox.setCheckState(QtCore.Qt.Unchecked)
+        checkbox.setEnabled(True)
+        checkbox.setPalette(self.palettes[None])
+        checkbox.blockSignals(False)
+
     def update_checkbox(self, checkbox, idx, status):
         if status and idx == 0:
             checkbox.setCheckState(QtCore.Qt.Checked)
@@ -403,11 +490,17 @@ class WorkflowDialog(NXDialog):
         for scan in self.enabled_scans:
             self.select_tasks(scan)
 
+    def status_slot(self, status):
+        return lambda: self.select_status(status)
+
     def select_status(self, status):
+        state = self.all_scans[status].checkState()
         for scan in self.enabled_scans:
-            if self.scans[scan][status].isEnabled():
-                self.scans[scan][status].setCheckState(
-                    self.all_scans[status].checkState())
+            checkbox = self.scans[scan][status]
+            if checkbox.isEnabled():
+                checkbox.blockSignals(True)
+                checkbox.setCheckState(state)
+                checkbox.blockSignals(False)
 
     def deselect_all(self):
         for scan in self.enabled_scans:
@@ -439,62 +532,88 @@ class WorkflowDialog(NXDialog):
 
     def queued(self, scan, task):
         self.scans[scan][task].setCheckState(QtCore.Qt.PartiallyChecked)
-        self.scans[scan][task].setStyleSheet("")
+        self.scans[scan][task].setPalette(self.palettes[None])
         self.scans[scan][task].setEnabled(False)
 
     def add_tasks(self):
         if self.grid is None:
             raise NeXusError('Need to update status')
-        for scan in [s for s in self.enabled_scans if self.any_selected(s)]:
-            for i, entry in enumerate(self.enabled_scans[scan]['entries']):
-                if self.only_combined(scan):
-                    if i == 0:
-                        reduce = NXMultiReduce(scan)
-                        reduce.regular = reduce.mask = False
-                    else:
-                        break
-                else:
-                    reduce = NXReduce(entry, scan)
-                    reduce.regular = reduce.mask = False
-                    if self.selected(scan, 'link'):
-                        reduce.link = True
-                    if self.selected(scan, 'copy'):
-                        reduce.copy = True
-                    if self.selected(scan, 'max'):
-                        reduce.maxcount = True
-                    if self.selected(scan, 'find'):
-                        reduce.find = True
-                    if self.selected(scan, 'refine'):
-                        reduce.refine = True
-                    if self.selected(scan, 'prepare'):
-                        reduce.prepare = True
-                    if self.selected(scan, 'transform'):
-                        reduce.transform = True
-                        reduce.regular = True
-                    if self.selected(scan, 'masked_transform'):
-                        reduce.transform = True
-                        reduce.mask = True
-                if self.selected(scan, 'combine'):
-                    reduce.combine = True
-                    reduce.regular = True
-                if self.selected(scan, 'masked_combine'):
-                    reduce.combine = True
-                    reduce.mask = True
-                if self.selected(scan, 'pdf'):
-                    reduce.pdf = True
-                    reduce.regular = True
-                if self.selected(scan, 'masked_pdf'):
-                    reduce.pdf = True
-                    reduce.mask = True
-                if self.selected(scan, 'overwrite'):
-                    reduce.overwrite = True
-                reduce.queue('nxreduce')
+        selected = {scan: {task: self.selected(scan, task)
+                           for task in self.tasks + ['overwrite']}
+                    for scan in self.enabled_scans}
+        scans = [s for s in selected
+                 if any(selected[s][t] for t in self.tasks)]
+        # Scans are queued in parallel, but the entries of each scan are
+        # queued in order. Scans with only combined tasks are queued from
+        # the dialog thread.
+        jobs = []
+        for scan in scans:
+            state = selected[scan]
+            only_combined = not any(state[t] for t in self.tasks
+                                    if t not in self.combined_tasks)
+            if only_combined:
+                self.queue_reduce(scan, None, state)
                 time.sleep(0.5)
+            else:
+                jobs.append(scan)
+        if jobs:
+            with ThreadPoolExecutor(max_workers=min(8, len(jobs))) as ex:
+                list(ex.map(self.queue_scan, jobs,
+                            [selected[scan] for scan in jobs]))
+        for scan in scans:
             for task in self.tasks:
-                if self.selected(scan, task):
+                if selected[scan][task]:
                     self.queued(scan, task)
         self.deselect_all()
 
+    def queue_scan(self, scan, state):
+        for entry in self.enabled_scans[scan]['entries']:
+            self.queue_reduce(scan, entry, state)
+            time.sleep(0.5)
+
+    def queue_reduce(self, scan, entry, state):
+        if entry is None:
+            reduce = NXMultiReduce(scan)
+            reduce.server = self.server
+            reduce.regular = reduce.mask = False
+        else:
+            reduce = NXReduce(entry, scan)
+            reduce.server = self.server
+            reduce.regular = reduce.mask = False
+            if state['link']:
+                reduce.link = True
+            if state['copy']:
+                reduce.copy = True
+            if state['max']:
+                reduce.maxcount = True
+            if state['find']:
+                reduce.find = True
+            if state['refine']:
+                reduce.refine = True
+            if state['prepare']:
+                reduce.prepare = True
+            if state['transform']:
+                reduce.transform = True
+                reduce.regular = True
+            if state['masked_transform']:
+                reduce.transform = True
+                reduce.mask = True
+        if state['combine']:
+            reduce.combine = True
+            reduce.regular = True
+        if state['masked_combine']:
+            reduce.combine = True
+            reduce.mask = True
+        if state['pdf']:
+            reduce.pdf = True
+            reduce.regular = True
+        if state['masked_pdf']:
+            reduce.pdf = True
+            reduce.mask = True
+        if state['overwrite']:
+            reduce.overwrite = True
+        reduce.queue('nxreduce')
+
     def view_logs(self):
         if self.grid is None:
             raise NeXusError('Need to update status')
@@ -550,14 +669,13 @@ class WorkflowDialog(NXDialog):
             self.output_box.setPlainText('Directory has not been created')
             return
         text = []
-
-        def _getmtime(entry):
-            return entry.stat().st_mtime
-        for f in sorted(os.scandir(scan_directory), key=_getmtime):
+        with os.scandir(scan_directory) as entries:
+            files = [(f.stat(), f.name) for f in entries]
+        for info, name in sorted(files, key=lambda f: f[0].st_mtime):
             text.append('{0}   {1}   {2}'.format(
-                format_mtime(f.stat().st_mtime),
-                human_size(f.stat().st_size, width=6),
-                f.name))
+                format_mtime(info.st_mtime),
+                human_size(info.st_size, width=6),
+                name))
         if text:
             self.output_box.setPlainText('\n'.join(text))
         else:
@@ -567,9 +685,28 @@ class WorkflowDialog(NXDialog):
         self.defaultview = self.serverview
         scan = os.path.join(self.sample, self.label,
                             self.scan_combo.currentText())
-        with open(self.server.log_file) as f:
-            lines = f.readlines()
-        text = [line for line in lines if scan in line]
+        # Skip log entries written before the scan's data files, unless
+        # that leaves none, since files copied without preserving their
+        # modification times can postdate the scan's log entries
+        scan_directory = os.path.join(self.sample_directory,
+                                      self.scan_combo.currentText())
+        try:
+            with os.scandir(scan_directory) as entries:
+                start_time = min(e.stat().st_mtime for e in entries) - 86400
+            start = find_log_offset(self.server.log_file, start_time)
+        except (OSError, ValueError):
+            start = 0
+        text = read_last_lines(self.server.log_file, lambda l: True,
+                               contains=scan, start=start)
+        if start > 0:
+            if text:
+                text.insert(0, 'Entries logged before ' +
+                            time.strftime('%Y-%m-%d %H:%M:%S',
+                                          time.localtime(start_time)) +
+                            ' are not shown\n')
+            else:
+                text = read_last_lines(self.server.log_file, lambda l: True,
+                                       contains=scan)
         if text:
             self.output_box.setPlainText(''.join(text))
             self.output_box.verticalScrollBar().setValue(
@@ -584,11 +721,12 @@ class WorkflowDialog(NXDialog):
         entry = self.entry_combo.currentText()
         prefix = scan + "['" + entry + "']: "
         alternate_prefix = scan + "['entry']: "
-        with open(os.path.join(self.task_directory, 'nxlogger.log')) as f:
-            lines = f.readlines()
-        text = [line.replace(prefix, '').replace(alternate_prefix, '')
-                for line in lines if scan in line
-                if (entry in line or 'entry' in line)]
+        prefixes = re.compile(
+            re.escape(prefix) + '|' + re.escape(alternate_prefix))
+        text = [prefixes.sub('', line)
+                for line in read_last_lines(
+                    os.path.join(self.task_directory, 'nxlogger.log'),
+                    lambda l: entry in l or 'entry' in l, contains=scan)]
         if text:
             self.output_box.setPlainText(''.join(text))
             self.output_box.verticalScrollBar().setValue(
@@ -596,6 +734,17 @@ class WorkflowDialog(NXDialog):
         else:
             self.output_box.setPlainText('No Logs')
 
+    def load_wrapper(self, wrapper_file, max_files=8):
+        """Return the wrapper file, reloading it only if it has changed."""
+        key = (wrapper_file, os.path.getmtime(wrapper_file))
+        if key in self.wrapper_cache:
+            self.wrapper_cache.move_to_end(key)
+        else:
+            self.wrapper_cache[key] = nxload(wrapper_file, 'r')
+            while len(self.wrapper_cache) > max_files:
+                self.wrapper_cache.popitem(last=False)
+        return self.wrapper_cache[key]
+
     def outview(self):
         self.defaultview = self.outview
         scan = self.sample + '_' + self.scan_combo.currentText()
@@ -605,8 +754,8 @@ class WorkflowDialog(NXDialog):
                 task == 'nxpdf'):
             entry = 'entry'
         wrapper_file = os.path.join(self.sample_directory, scan+'.nxs')
-        root = nxload(wrapper_file)
-        if task in root[entry]:
+        root = self.load_wrapper(wrapper_file)
+        if entry in root and task in root[entry]:
             text = 'Date: ' + root[entry][task]['date'].nxvalue + '\n'
             text = text + root[entry][task]['note/data'].nxvalue
             self.output_box.setPlainText(text)
@@ -633,20 +782,20 @@ class WorkflowDialog(NXDialog):
                     'nxpdf', 'nxprepare', 'nxreduce', 'nxrefine', 'nxsum',
                     'nxtransform']
         if self.server.server_type == 'multicore':
-            command = f"ps -auxww | grep -e {' -e '.join(patterns)}"
-        else:
-            command = "pdsh -w {} 'ps -f' | grep -e {}".format(
-                ",".join(self.server.cpus), " -e ".join(patterns))
-        process = subprocess.run(command, shell=True, stdout=subprocess.PIPE,
-                                 stderr=subprocess.PIPE)
-        if process.returncode == 0:
-            lines = [line for line in sorted(
-                process.stdout.decode().split('\n')) if line]
-            lines = [line[line.index('nx'):]
-                     for line in lines if 'grep' not in line]
-            self.output_box.setPlainText('\n'.join(set(lines)))
+            lines = [' '.join(p.info['cmdline'])
+                     for p in psutil.process_iter(['cmdline'])
+                     if p.info['cmdline']]
         else:
-            self.output_box.setPlainText(process.stderr.decode())
+            process = subprocess.run(
+                ['pdsh', '-w', ','.join(self.server.cpus), 'ps -f'],
+                stdout=subprocess.PIPE, stderr=subprocess.PIPE)
+            if process.returncode != 0:
+                self.output_box.setPlainText(process.stderr.decode())
+                return
+            lines = process.stdout.decode().split('\n')
+        lines = [line[line.index('nx'):] for line in sorted(lines)
+                 if any(p in line for p in patterns)]
+        self.output_box.setPlainText('\n'.join(set(lines)))
 
     def cpuview(self):
         cpu = self.cpu_combo.selected
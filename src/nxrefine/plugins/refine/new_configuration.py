@@ -15,7 +15,6 @@ from nexusformat.nexus import (NXdetector, NXentry, NXfield, NXgoniometer,
                                NXinstrument, NXmonochromator, NXparameters,
                                NXroot)
 from nxrefine.nxsettings import NXSettings
-from pyFAI.detectors import ALL_DETECTORS
 
 
 def show_dialog():
@@ -135,6 +134,7 @@ class ConfigurationDialog(NXDialog):
         self.instrument = GridParameters()
         self.instrument.add('distance', entry['instrument/detector/distance'],
                             'Detector Distance (mm)')
+        from pyFAI.detectors import ALL_DETECTORS
         detector_list = sorted(list(set([detector().name
                                     for detector in ALL_DETECTORS.values()])))
         self.instrument.add('detector', detector_list, 'Detector')
@@ -154,6 +154,7 @@ class ConfigurationDialog(NXDialog):
         self.configuration_file[f'f{position}'] = entry
 
     def get_detector(self):
+        from pyFAI.detectors import ALL_DETECTORS
         for detector in ALL_DETECTORS:
             if (ALL_DETECTORS[detector]().name
                     == self.instrument['detector'].value):
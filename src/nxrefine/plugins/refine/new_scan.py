@@ -6,6 +6,7 @@
 # The full license is in the file COPYING, distributed with this software.
 # -----------------------------------------------------------------------------
 
+import math
 import os
 
 import numpy as np
@@ -76,17 +77,20 @@ class ScanDialog(NXDialog):
 
     def choose_directory(self):
         super().choose_directory()
-        self.mainwindow.default_directory = self.get_directory()
-        self.setup_directory()
+        home_directory = self.get_directory()
+        self.mainwindow.default_directory = home_directory
+        self.setup_directory(home_directory)
         self.insert_layout(1, self.sample_layout)
 
-    def setup_directory(self):
+    def setup_directory(self, home_directory=None):
+        if home_directory is None:
+            home_directory = self.get_directory()
         self.sample_box.clear()
-        samples = self.get_samples()
+        samples = self.get_samples(home_directory)
         for sample in samples:
             self.sample_box.addItem(sample)
         self.sample_box.adjustSize()
-        configurations = self.get_configurations()
+        configurations = self.get_configurations(home_directory)
         self.configuration_box.clear()
         for configuration in configurations:
             self.configuration_box.addItem(configuration)
@@ -94,26 +98,24 @@ class ScanDialog(NXDialog):
     def select_sample(self):
         return self.select_box(self.get_samples())
 
-    def get_samples(self):
-        home_directory = self.get_directory()
-        if os.path.exists(home_directory):
-            sample_directories = [f for f in os.listdir(home_directory)
-                                  if (not f.startswith('.') and
-                                      os.path.isdir(
-                                      os.path.join(home_directory, f)))]
-        else:
-            return []
+    def get_samples(self, home_directory=None):
+        if home_directory is None:
+            home_directory = self.get_directory()
         samples = []
-        for sample_directory in sample_directories:
-            label_directories = [
-                f
-                for f in os.listdir(
-                    os.path.join(home_directory, sample_directory))
-                if os.path.isdir(
-                    os.path.join(home_directory, sample_directory, f))]
-            for label_directory in label_directories:
-                samples.append(os.path.join(sample_directory, label_directory))
-        return [sample.strip() for sample in samples]
+        try:
+            with os.scandir(home_directory) as sample_entries:
+                for sample_entry in sample_entries:
+                    if (sample_entry.name.startswith('.') or
+                            not sample_entry.is_dir()):
+                        continue
+                    with os.scandir(sample_entry.path) as label_entries:
+                        samples.extend(
+                            f"{sample_entry.name}/{label_entry.name}"
+                            for label_entry in label_entries
+                            if label_entry.is_dir())
+        except FileNotFoundError:
+            return []
+        return samples
 
     def choose_sample(self):
         self.insert_layout(2, self.configuration_layout)
@@ -121,16 +123,15 @@ class ScanDialog(NXDialog):
     def select_configuration(self):
         return self.select_box(self.get_configurations())
 
-    def get_configurations(self):
-        home_directory = self.get_directory()
-        if (os.path.exists(home_directory) and
-                'configurations' in os.listdir(home_directory)):
-            return sorted(
-                [f
-                 for f in os.listdir(
-                     os.path.join(home_directory, 'configurations'))
-                 if f.endswith('.nxs')])
-        else:
+    def get_configurations(self, home_directory=None):
+        if home_directory is None:
+            home_directory = self.get_directory()
+        config_directory = os.path.join(home_directory, 'configurations')
+        try:
+            with os.scandir(config_directory) as entries:
+                return sorted(e.name for e in entries
+                              if e.name.endswith('.nxs') and e.is_file())
+        except (FileNotFoundError, NotADirectoryError):
             return []
 
     def choose_configuration(self):
@@ -140,20 +141,18 @@ class ScanDialog(NXDialog):
         if os.path.exists(config_file):
             self.config_file = nxload(config_file)
             self.positions = len(self.config_file.entries) - 1
+            self.entries = {}
             self.scan_box.clear()
             for position in range(1, self.positions+1):
                 self.scan_box.addItem(f'{position}')
             self.scan_box.setCurrentIndex(0)
             self.copy_configuration()
         self.setup_scans()
-        self.read_parameters()
         self.insert_layout(3, self.scan.grid(header=False))
         self.insert_layout(4, self.scan_layout)
-        for p in range(1, self.positions+1):
-            self.insert_layout(p+4, self.entries[p].grid_layout)
-        self.insert_layout(self.positions+5,
-                           self.action_buttons(('Make Scan File',
-                                                self.make_scan)))
+        self.insert_layout(5, self.action_buttons(('Make Scan File',
+                                                   self.make_scan)))
+        self.mount_position(1)
 
     def setup_scans(self):
         default = self.settings['nxrefine']
@@ -165,8 +164,7 @@ class ScanDialog(NXDialog):
         self.scan.add('phi_step', default['phi_step'], 'Phi Step (deg)')
         self.scan.add('frame_rate', default['frame_rate'], 'Frame Rate (Hz)')
 
-        for position in range(1, self.positions+1):
-            self.setup_position(position)
+        self.entries = {}
 
     def setup_position(self, position):
         default = self.settings['nxrefine']
@@ -180,35 +178,42 @@ class ScanDialog(NXDialog):
         self.entries[position].add(
             'linkpath', '/entry/data/data', 'Detector Data Path')
         self.entries[position].grid(header=False)
-        if position != 1:
-            self.entries[position].hide_grid()
+
+    def mount_position(self, position):
+        """Create the parameter grid for a position when first needed."""
+        if position not in self.entries:
+            self.setup_position(position)
+            self.read_parameters(position)
+            self.insert_layout(5, self.entries[position].grid_layout)
+            if position != self.position:
+                self.entries[position].hide_grid()
+        return self.entries[position]
 
     def choose_position(self):
+        if not self.entries:
+            return
         for i in self.entries:
             self.entries[i].hide_grid()
-        if self.position in self.entries:
-            self.entries[self.position].show_grid()
+        self.mount_position(self.position).show_grid()
 
     def copy_configuration(self):
         self.scan_file = NXroot()
         for entry in self.config_file.entries:
             self.scan_file[entry] = self.config_file[entry]
 
-    def read_parameters(self):
-        for position in range(1, self.positions+1):
-            entry = self.scan_file[f'f{position:d}']
-            if 'instrument/goniometer/chi' in entry:
-                self.entries[position]['chi'].value = (
-                    entry['instrument/goniometer/chi'])
-            if 'instrument/goniometer/omega' in entry:
-                self.entries[position]['omega'].value = (
-                    entry['instrument/goniometer/omega'])
-            if 'instrument/detector/translation_x' in entry:
-                self.entries[position]['x'].value = (
-                    entry['instrument/detector/translation_x'])
-            if 'instrument/detector/translation_y' in entry:
-                self.entries[position]['y'].value = (
-                    entry['instrument/detector/translation_y'])
+    def read_parameters(self, position):
+        entry = self.scan_file[f'f{position:d}']
+        parameters = self.entries[position]
+        if 'instrument/goniometer' in entry:
+            goniometer = entry['instrument/goniometer']
+            for name in ('chi', 'omega'):
+                if name in goniometer:
+                    parameters[name].value = goniometer[name]
+        if 'instrument/detector' in entry:
+            detector = entry['instrument/detector']
+            for name in ('x', 'y'):
+                if f'translation_{name}' in detector:
+                    parameters[name].value = detector[f'translation_{name}']
 
     def get_parameters(self):
         entry = self.scan_file['entry']
@@ -220,15 +225,26 @@ class ScanDialog(NXDialog):
         entry['sample/temperature'].attrs['units'] = 'K'
         y_size, x_size = entry['instrument/detector/shape'].nxvalue
         scan = self.scan['scan'].value
+        phi_start = self.scan['phi_start'].value
+        phi_end = self.scan['phi_end'].value
+        phi_step = self.scan['phi_step'].value
+        frame_rate = self.scan['frame_rate'].value
+        x_pixel = np.arange(x_size, dtype=np.int32)
+        y_pixel = np.arange(y_size, dtype=np.int32)
+        if phi_step == 0.0:
+            raise NeXusError("Phi step must be non-zero")
+        # Include a final partial step, as in np.arange, but ignore
+        # rounding errors in the division
+        frames = math.ceil((phi_end - phi_start) / phi_step - 1e-6)
+        if frames <= 0:
+            raise NeXusError("Phi range and step define no frames")
+        frame_number = np.arange(frames, dtype=np.int32)
         for position in range(1, self.positions+1):
             entry = self.scan_file[f'f{position:d}']
             entry.makelink(self.scan_file['entry/sample'])
-            phi_start = self.scan['phi_start'].value
-            phi_end = self.scan['phi_end'].value
-            phi_step = self.scan['phi_step'].value
-            chi = self.entries[position]['chi'].value
-            omega = self.entries[position]['omega'].value
-            frame_rate = self.scan['frame_rate'].value
+            parameters = self.mount_position(position)
+            chi = parameters['chi'].value
+            omega = parameters['omega'].value
             if 'goniometer' not in entry['instrument']:
                 entry['instrument/goniometer'] = NXgoniometer()
             entry['instrument/goniometer/phi'] = phi_start
@@ -241,31 +257,24 @@ class ScanDialog(NXDialog):
             entry['instrument/goniometer/omega_set'] = omega
             if frame_rate > 0.0:
                 entry['instrument/detector/frame_time'] = 1.0 / frame_rate
-            linkpath = self.entries[position]['linkpath'].value
+            linkpath = parameters['linkpath'].value
             linkfile = os.path.join(
-                scan, self.entries[position]['linkfile'].value)
+                scan, parameters['linkfile'].value)
             entry['data'] = NXdata()
             entry['data'].nxsignal = NXlink(linkpath, linkfile)
-            entry['data/x_pixel'] = np.arange(x_size, dtype=np.int32)
-            entry['data/y_pixel'] = np.arange(y_size, dtype=np.int32)
-            entry['data/frame_number'] = np.arange(
-                (phi_end-phi_start)/phi_step, dtype=np.int32)
-            entry['data'].nxaxes = [entry['data/frame_number'],
-                                    entry['data/y_pixel'],
-                                    entry['data/x_pixel']]
+            entry['data/x_pixel'] = x_pixel
+            entry['data/y_pixel'] = y_pixel
+            entry['data/frame_number'] = frame_number
+            entry['data'].nxaxes = ['frame_number', 'y_pixel', 'x_pixel']
 
     def make_scan(self):
         home_directory = self.get_directory()
         self.mainwindow.default_directory = home_directory
-        sample_directory = os.path.join(home_directory, self.sample)
         label_directory = os.path.join(home_directory, self.sample, self.label)
         scan_directory = os.path.join(
             label_directory, str(self.scan['scan'].value))
         scan_name = self.sample+'_'+self.scan['scan'].value
-        try:
-            os.makedirs(scan_directory)
-        except Exception:
-            pass
+        os.makedirs(scan_directory, exist_ok=True)
         self.copy_configuration()
         self.get_parameters()
         self.scan_file.save(os.path.join(label_directory, scan_name+'.nxs'))
@@ -47,14 +47,13 @@ class SettingsDialog(NXDialog):
         self.define_parameters()
 
     def define_parameters(self):
+        settings = self.settings.settings
         self.refine_parameters = GridParameters()
-        defaults = self.settings.settings['nxrefine']
-        for p in defaults:
-            self.refine_parameters.add(p, defaults[p], p)
+        for p, value in settings['nxrefine'].items():
+            self.refine_parameters.add(p, value, p)
         self.reduce_parameters = GridParameters()
-        defaults = self.settings.settings['nxreduce']
-        for p in defaults:
-            self.reduce_parameters.add(p, defaults[p], p)
+        for p, value in settings['nxreduce'].items():
+            self.reduce_parameters.add(p, value, p)
         if self.layout.count() == 2:
             self.layout.insertLayout(
                 1, self.refine_parameters.grid(header=False, title='NXRefine'))
@@ -8,8 +8,10 @@
 # -----------------------------------------------------------------------------
 
 import argparse
+import os
+from concurrent.futures import ProcessPoolExecutor, as_completed
 
-from nxrefine.nxreduce import NXMultiReduce, NXReduce
+from nxrefine.nxreduce import NXMultiReduce, NXReduce, reduce_entry
 
 
 def main():
@@ -46,6 +48,8 @@ def main():
                         help='overwrite existing maximum')
     parser.add_argument('-q', '--queue', action='store_true',
                         help='add to server task queue')
+    parser.add_argument('-j', '--parallel', action='store_true',
+                        help='reduce entries in parallel processes')
 
     args = parser.parse_args()
 
@@ -54,19 +58,29 @@ def main():
     else:
         entries = NXMultiReduce(args.directory).entries
 
-    for entry in entries:
-        reduce = NXReduce(entry=entry, directory=args.directory,
-                          link=args.link, maxcount=args.max, find=args.find,
-                          copy=args.copy, refine=args.refine,
-                          prepare=args.prepare, transform=args.transform,
-                          combine=args.combine, pdf=args.pdf,
-                          regular=args.regular, mask=args.mask,
-                          overwrite=args.overwrite)
-        if args.queue:
-            reduce.queue('nxreduce', args)
-        else:
-            reduce.combine = reduce.pdf = False
-            reduce.nxreduce()
+    kwargs = dict(link=args.link, maxcount=args.max, find=args.find,
+                  copy=args.copy, refine=args.refine, prepare=args.prepare,
+                  transform=args.transform, combine=args.combine,
+                  pdf=args.pdf, regular=args.regular, mask=args.mask,
+                  overwrite=args.overwrite)
+
+    if args.parallel and not args.queue and entries:
+        workers = min(len(entries), os.cpu_count() or 1)
+        with ProcessPoolExecutor(max_workers=workers) as executor:
+            futures = [executor.submit(reduce_entry, entry, args.directory,
+                                       **kwargs)
+                       for entry in entries]
+            for future in as_completed(futures):
+                future.result()
+    else:
+        for entry in entries:
+            reduce = NXReduce(entry=entry, directory=args.directory,
+                              **kwargs)
+            if args.queue:
+                reduce.queue('nxreduce', args)
+            else:
+                reduce.combine = reduce.pdf = False
+                reduce.nxreduce()
     if (args.combine or args.pdf) and not args.queue:
         reduce = NXMultiReduce(args.directory, combine=args.combine,
                                pdf=args.pdf, regular=args.regular,